@@ -17,6 +17,18 @@ CREATE TABLE IF NOT EXISTS pastes (
         CONSTRAINT pk_id_uid PRIMARY KEY (id, uid)
 );
 
+ALTER TABLE pastes ADD COLUMN IF NOT EXISTS edited_at TIMESTAMPTZ;
+ALTER TABLE pastes ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS pastes_mid_idx ON pastes (mid);
+
+CREATE TABLE IF NOT EXISTS paste_digests (
+    digest BYTEA PRIMARY KEY, -- BLAKE2b of the normalised files uploaded
+    id TEXT NOT NULL, -- the MystBin paste ID
+    expires_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS paste_digests_id_idx ON paste_digests (id);
+
 CREATE TABLE IF NOT EXISTS timezones (
     uid BIGINT PRIMARY KEY,
     timezone TEXT NOT NULL
@@ -36,4 +48,12 @@ CREATE TABLE IF NOT EXISTS open_collective_sync (
     expires_at TIMESTAMP NOT NULL -- the time the access token expires
 );
 
-CREATE INDEX IF NOT EXISTS open_collective_sync_account_id_idx ON open_collective_sync (account_id);
\ No newline at end of file
+ALTER TABLE open_collective_sync ADD COLUMN IF NOT EXISTS metadata_hash BYTEA; -- BLAKE2b of the last role connection pushed
+
+CREATE INDEX IF NOT EXISTS open_collective_sync_account_id_idx ON open_collective_sync (account_id);
+CREATE INDEX IF NOT EXISTS open_collective_sync_expires_at_idx ON open_collective_sync (expires_at);
+
+CREATE TABLE IF NOT EXISTS open_collective_checkpoints (
+    slug TEXT PRIMARY KEY, -- the open collective being synced
+    last_created_at TIMESTAMPTZ NOT NULL -- the createdAt of the newest transaction processed
+);
\ No newline at end of file
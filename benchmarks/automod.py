@@ -0,0 +1,299 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Offline replay of message and join events through the `Pythonista` automod.
+
+Events (see `benchmarks.raid_traffic` for the format) are fed through the cog's own `on_member_join` and
+`on_message` listeners with small `discord.Member` and `discord.Message` doubles, as fast as they can be processed.
+Every automod window runs on a clock driven by the event times, so a trace replays exactly as it was recorded
+no matter how fast it is replayed. Bans and log messages are recorded instead of being sent to Discord.
+
+Reports throughput, each rule's latency and hits, the decisions made (scored against the `raider` labels when the
+trace has them) and how the automod's state grows over the run.
+
+Run from the repository root (requires the same environment and config.toml as the bot):
+
+    python -m benchmarks.automod [--events events.jsonl] [--minutes 10] [--raiders 40] [--memory]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import pathlib
+import time
+import tracemalloc
+from typing import TYPE_CHECKING, Any
+
+import discord
+
+import core
+from extensions.pythonista import Pythonista
+
+from .raid_traffic import generate
+
+
+if TYPE_CHECKING:
+    from discord.abc import Snowflake
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Guild:
+    def __init__(self, id: int) -> None:
+        self.id: int = id
+        self.members: dict[int, Member] = {}
+
+    def __str__(self) -> str:
+        return f"guild{self.id}"
+
+    def get_member(self, id: int, /) -> Member | None:
+        return self.members.get(id)
+
+
+class Channel:
+    def __init__(self, id: int) -> None:
+        self.id: int = id
+
+
+class Member(discord.Member):
+    # Only what the automod reads is filled in; the gateway state of a real member is never touched...
+    def __init__(self, id: int, guild: Guild, *, clock: Clock, joined: float, created: float) -> None:
+        self.guild = guild  # type: ignore
+        self._replay_id: int = id
+        self._replay_clock: Clock = clock
+        self._replay_joined: float = joined
+        self._replay_created: float = created
+
+    def __str__(self) -> str:
+        return f"member{self._replay_id}"
+
+    def __repr__(self) -> str:
+        return f"<Member id={self._replay_id}>"
+
+    def _since(self, at: float) -> datetime.datetime:
+        # The automod compares against the wall clock, so event times are mapped onto it relative to now...
+        return discord.utils.utcnow() - datetime.timedelta(seconds=self._replay_clock() - at)
+
+    @property
+    def id(self) -> int:  # type: ignore
+        return self._replay_id
+
+    @property
+    def bot(self) -> bool:  # type: ignore
+        return False
+
+    @property
+    def name(self) -> str:  # type: ignore
+        return str(self)
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self._replay_id}>"
+
+    @property
+    def joined_at(self) -> datetime.datetime:  # type: ignore
+        return self._since(self._replay_joined)
+
+    @property
+    def created_at(self) -> datetime.datetime:  # type: ignore
+        return self._since(self._replay_created)
+
+    @property
+    def roles(self) -> list[discord.Object]:  # type: ignore
+        return []
+
+    @property
+    def guild_permissions(self) -> discord.Permissions:
+        return discord.Permissions.none()
+
+
+class Message:
+    def __init__(self, author: Member, guild: Guild, channel: Channel, content: str) -> None:
+        self.author: Member = author
+        self.guild: Guild = guild
+        self.channel: Channel = channel
+        self.content: str = content
+
+
+class RecordingDispatcher(core.BanDispatcher):
+    def __init__(self, clock: Clock) -> None:
+        super().__init__()
+        self.clock: Clock = clock
+        self.bans: list[tuple[float, int, str]] = []
+
+    async def _ban(
+        self, guild: discord.Guild, user: Snowflake, *, reason: str | None, delete_message_seconds: int
+    ) -> core.BanResult:
+        self.bans.append((self.clock(), user.id, reason or ""))
+        guild.members.pop(user.id, None)  # type: ignore
+
+        return core.BanResult(guild, user)
+
+
+class ReplayPythonista(Pythonista):
+    def __init__(self, bot: core.Bot, *, clock: Clock) -> None:
+        super().__init__(bot, clock=clock)
+        self.recorder: RecordingDispatcher = RecordingDispatcher(clock)
+        self.bans = self.recorder
+        self.logs: list[tuple[float, str]] = []
+
+    async def _log(self, content: str) -> None:
+        self.logs.append((self.clock(), content))
+
+
+def load(args: argparse.Namespace) -> list[dict[str, Any]]:
+    if not args.events:
+        return generate(
+            minutes=args.minutes,
+            rate=args.rate,
+            members=args.members,
+            joins=args.joins,
+            raiders=args.raiders,
+            raid_at=args.raid_at,
+            burst=args.burst,
+            seed=args.seed,
+        )
+
+    with args.events.open(encoding="UTF-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def state(cog: Pythonista) -> str:
+    return f"spread {len(cog.spread) if cog.spread else 0} members | {cog.duplicates!r}"
+
+
+async def replay(args: argparse.Namespace) -> None:
+    events: list[dict[str, Any]] = load(args)
+    clock: Clock = Clock()
+
+    # The automod never touches the bot's database or web client...
+    bot: core.Bot = core.Bot(database=None, web=None)  # type: ignore
+    cog: ReplayPythonista = ReplayPythonista(bot, clock=clock)
+
+    guilds: dict[int, Guild] = {}
+    channels: dict[int, Channel] = {}
+    raiders: set[int] = set()
+    seen: set[int] = set()
+
+    checkpoint: int = max(1, len(events) // 10)
+    handled: collections.Counter[str] = collections.Counter()
+    busy: float = 0.0
+
+    if args.memory:
+        tracemalloc.start()
+
+    print(f"{'events':>9} {'trace s':>9} {'events/s':>10} {'traced MB':>10}  state")
+
+    for index, event in enumerate(events, 1):
+        clock.now = event["t"]
+        guild: Guild = guilds.setdefault(event["guild"], Guild(event["guild"]))
+        member_id: int = event["member"]
+
+        start: float = time.perf_counter()
+
+        if cog.spread:
+            cog.spread.advance()
+
+        if event["type"] == "join":
+            member: Member = Member(member_id, guild, clock=clock, joined=clock.now, created=clock.now - event.get("age", 0))
+            guild.members[member_id] = member
+            seen.add(member_id)
+
+            if event.get("raider"):
+                raiders.add(member_id)
+
+            await cog.on_member_join(member)
+
+        elif event["type"] == "message":
+            author: Member | None = guild.members.get(member_id)
+
+            if author is None and member_id not in seen:
+                seen.add(member_id)
+                author = guild.members[member_id] = Member(member_id, guild, clock=clock, joined=-1e7, created=-1e8)
+
+            # Banned members are removed from the guild, and can't post anymore...
+            if author is not None:
+                channel: Channel = channels.setdefault(event["channel"], Channel(event["channel"]))
+                await cog.on_message(Message(author, guild, channel, event["content"]))  # type: ignore
+
+        busy += time.perf_counter() - start
+        handled[event["type"]] += 1
+
+        if index % checkpoint == 0 or index == len(events):
+            traced: float = tracemalloc.get_traced_memory()[0] / 1e6 if args.memory else 0.0
+            print(f"{index:>9} {clock.now:>9.1f} {index / busy:>10.0f} {traced:>10.2f}  {state(cog)}")
+
+    if args.memory:
+        peak: float = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        print(f"peak traced memory {peak:.2f} MB")
+
+    print(f"\n{dict(handled)} in {busy:.2f}s of handler time | {handled['message'] / busy:.0f} messages/s")
+
+    print("\nrule          hits    runs  errors   mean ms    p95 ms    max ms")
+    for rule in cog.automod.rules:
+        s: core.LatencyStats = rule.stats
+        print(
+            f"{rule.name:<12} {rule.hits:>5} {s.requests:>7} {s.errors:>7} "
+            f"{s.mean:>9.4f} {s.percentile(95):>9.4f} {s.max:>9.4f}"
+        )
+
+    bans: list[tuple[float, int, str]] = cog.recorder.bans
+    reasons: collections.Counter[str] = collections.Counter(reason for _, _, reason in bans)
+    banned: set[int] = {member for _, member, _ in bans}
+
+    print(f"\n{len(bans)} bans of {len(banned)} members")
+    for reason, count in reasons.most_common():
+        print(f"  {count:>5}  {reason}")
+
+    for at, content in cog.logs:
+        print(f"  log at {at:.1f}s: {content}")
+
+    if raiders:
+        caught: int = len(banned & raiders)
+        print(
+            f"\nraiders caught {caught}/{len(raiders)} | members wrongly banned {len(banned - raiders)} | "
+            f"first raid ban {min((at for at, m, _ in bans if m in raiders), default=float('nan')):.1f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay message and join events through the Pythonista automod offline.")
+    parser.add_argument("--events", type=pathlib.Path, default=None, help="JSONL trace to replay instead of a generated one")
+    parser.add_argument("--memory", action="store_true", help="trace memory with tracemalloc, which slows the replay")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=3, help="messages per second from long-standing members")
+    parser.add_argument("--members", type=int, default=400)
+    parser.add_argument("--joins", type=float, default=2, help="ordinary joins per minute")
+    parser.add_argument("--raiders", type=int, default=40)
+    parser.add_argument("--raid-at", type=float, default=0.5)
+    parser.add_argument("--burst", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
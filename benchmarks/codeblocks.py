@@ -0,0 +1,142 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Benchmark for `core.CodeBlocks.convert` against the previous line-based implementation.
+
+Run from the repository root (requires the same environment and config.toml as the bot):
+
+    python -m benchmarks.codeblocks [--number 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+from typing import TYPE_CHECKING
+
+from core.utils import CodeBlocks
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from types_.codeblocks import CodeBlock
+
+
+SNIPPET: str = """import asyncio
+
+
+async def main() -> None:
+    for i in range(10):
+        print(f"Hello {i}")
+        await asyncio.sleep(0.1)
+
+
+asyncio.run(main())"""
+
+PROSE: str = "I tried this but it still doesn't work, any ideas what I'm doing wrong here? "
+
+
+def legacy_convert(content: str) -> CodeBlocks:
+    splat: list[str] = content.split("\n")
+
+    in_block: bool = False
+    lang: str | None = None
+    lines: list[str] = []
+    blocks: list[CodeBlock] = []
+
+    for line in splat:
+        if in_block and "```" not in line:
+            lines.append(line)
+
+        elif not in_block and "```" in line:
+            lang = line[line.index("`") :].split()[0].strip("```") or None
+            line = line.replace("```", "", 1)
+
+            if "```" in line:
+                data = line.replace("```", "")
+
+                if data:
+                    blocks.append({"language": None, "content": data})
+
+                lang = None
+                lines = []
+                continue
+
+            in_block = True
+
+        elif in_block and "```" in line:
+            if not lines:
+                continue
+
+            blocks.append({"language": lang, "content": "\n".join(lines)})
+
+            lang = None
+            lines = []
+            in_block = False
+
+    return CodeBlocks(blocks)
+
+
+def build(size: int, *, seed: int = 0, density: float = 0.4) -> str:
+    rand: random.Random = random.Random(seed)
+    parts: list[str] = []
+    total: int = 0
+
+    while total < size:
+        if rand.random() < density:
+            part = f"```py\n{SNIPPET}\n```\n"
+        elif rand.random() < 0.1:
+            part = f"Use `asyncio.run` like this: ```asyncio.run(main())``` {PROSE}\n"
+        else:
+            part = PROSE * rand.randint(1, 4) + "\n"
+
+        parts.append(part)
+        total += len(part)
+
+    return "".join(parts)[:size]
+
+
+def measure(name: str, func: Callable[[str], object], content: str, *, number: int) -> float:
+    best: float = min(timeit.repeat(lambda: func(content), number=number, repeat=5)) / number
+    print(f"  {name:<10} {best * 1_000_000:>12.2f} µs/call")
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark core.CodeBlocks.convert against the legacy implementation.")
+    parser.add_argument("--number", type=int, default=200, help="calls per timing run")
+    args = parser.parse_args()
+
+    cases: dict[str, str] = {
+        "message, no blocks (2,000 chars)": build(2_000, density=0.0),
+        "message, one block (2,000 chars)": f"{PROSE}\n```py\n{SNIPPET}\n```\n{PROSE * 20}"[:2_000],
+        "message, many blocks (2,000 chars)": build(2_000),
+        "attachment (300 KB)": build(300_000),
+    }
+
+    for label, content in cases.items():
+        number: int = args.number if len(content) <= 2_000 else max(1, args.number // 50)
+        print(f"{label}: {len(CodeBlocks.convert(content).blocks)} blocks")
+
+        legacy: float = measure("legacy", legacy_convert, content, number=number)
+        current: float = measure("single", CodeBlocks.convert, content, number=number)
+
+        print(f"  speedup    {legacy / current:>12.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
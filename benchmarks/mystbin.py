@@ -0,0 +1,229 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+End-to-end benchmark for the "Message to MystBin" context menu.
+
+Drives `MystBin.convert_mystbin` against the local stand-in server (see `benchmarks.mystbin_server`), with a
+temporary SQLite database and the shared WebClient, and reports throughput, latency percentiles and bytes per
+conversion. Nothing leaves the machine; Discord itself is replaced by the small message and interaction doubles below.
+
+Run from the repository root (requires the same environment and config.toml as the bot):
+
+    python -m benchmarks.mystbin [--conversions 500] [--concurrency 20] [--latency 0.02] [--error-rate 0.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import pathlib
+import random
+import statistics
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any
+
+import core
+import database
+from extensions.mystbin import MystBin
+
+from .codeblocks import PROSE, SNIPPET
+from .mystbin_server import MystBinStandIn
+
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
+class Author:
+    def __init__(self, id: int) -> None:
+        self.id: int = id
+        self.mention: str = f"<@{id}>"
+
+    def __str__(self) -> str:
+        return f"user{self.id}"
+
+
+class Channel:
+    def __init__(self, id: int) -> None:
+        self.id: int = id
+
+    def __str__(self) -> str:
+        return f"channel{self.id}"
+
+
+class Attachment:
+    def __init__(self, filename: str, content: str) -> None:
+        self.filename: str = filename
+        self.content_type: str = "text/plain; charset=utf-8"
+        self._data: bytes = content.encode()
+        self.size: int = len(self._data)
+        self.url: str = f"https://cdn.invalid/{filename}"
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+class Message:
+    def __init__(self, id: int, *, content: str, attachments: list[Attachment]) -> None:
+        self.id: int = id
+        self.author: Author = Author(id % 97)
+        self.channel: Channel = Channel(id % 13)
+        self.content: str = content
+        self.attachments: list[Attachment] = attachments
+        self.created_at: datetime.datetime = datetime.datetime.now(datetime.UTC)
+        self.edited_at: datetime.datetime | None = None
+
+
+class Sent:
+    def __init__(self, id: int) -> None:
+        self.id: int = id
+
+
+class Response:
+    async def defer(self, **kwargs: Any) -> None:
+        return None
+
+    def is_done(self) -> bool:
+        return True
+
+
+class Followup:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def send(self, content: str, **kwargs: Any) -> Sent:
+        self.messages.append(content)
+        return Sent(len(self.messages))
+
+
+class Interaction:
+    def __init__(self, user: Author) -> None:
+        self.user: Author = user
+        self.response: Response = Response()
+        self.followup: Followup = Followup()
+
+
+def build_message(index: int, rand: random.Random, *, attachments: int, duplicates: float) -> Message:
+    # Duplicated messages share their code, so they exercise the content digest instead of uploading again...
+    seed: int = rand.randrange(max(1, index)) if index and rand.random() < duplicates else index
+    code: str = f"{SNIPPET}\n# {seed}"
+    size: random.Random = random.Random(seed)
+
+    content: str = f"{PROSE}\n```py\n{code}\n```\n{PROSE}"
+    files: list[Attachment] = [
+        Attachment(f"traceback_{n}.txt", f"Traceback {seed}:\n" + PROSE * size.randint(10, 200)) for n in range(attachments)
+    ]
+
+    return Message(1_000_000 + index, content=content, attachments=files)
+
+
+def percentile(samples: Sequence[float], value: float, /) -> float:
+    ordered: list[float] = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * value / 100))]
+
+
+async def run(args: argparse.Namespace) -> None:
+    rand: random.Random = random.Random(args.seed)
+    messages: list[Message] = [
+        build_message(i, rand, attachments=args.attachments, duplicates=args.duplicates) for i in range(args.conversions)
+    ]
+
+    server: MystBinStandIn = MystBinStandIn(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path: str = str(pathlib.Path(tmp) / "benchmark.db")
+
+        async with (
+            server,
+            core.WebClient() as web,
+            database.SQLiteDatabase(path=path, web=None) as db,
+        ):
+            core.config.setdefault("MYSTBIN", {})["url"] = server.url
+
+            bot: core.Bot = core.Bot(database=db, web=web, debug=True)
+            cog: MystBin = MystBin(bot)
+
+            semaphore: asyncio.Semaphore = asyncio.Semaphore(args.concurrency)
+            latencies: list[float] = []
+            outcomes: dict[str, int] = {"created": 0, "reused": 0, "failed": 0}
+
+            async def convert(message: Message) -> None:
+                interaction: Interaction = Interaction(message.author)
+
+                async with semaphore:
+                    start: float = time.perf_counter()
+
+                    try:
+                        await cog.convert_mystbin(interaction, message)  # type: ignore
+                    except Exception:
+                        outcomes["failed"] += 1
+                        return
+                    finally:
+                        latencies.append(time.perf_counter() - start)
+
+                reply: str = interaction.followup.messages[-1] if interaction.followup.messages else ""
+                if "was shared on" in reply:
+                    outcomes["created"] += 1
+                elif "already on" in reply:
+                    outcomes["reused"] += 1
+                else:
+                    outcomes["failed"] += 1
+
+            started: float = time.perf_counter()
+            await asyncio.gather(*(convert(m) for m in messages))
+            elapsed: float = time.perf_counter() - started
+
+            await db.writer.flush()
+
+    ms: list[float] = [s * 1000 for s in latencies]
+    total: int = len(messages)
+
+    print(f"{total} conversions, concurrency {args.concurrency}, {args.attachments} attachment(s) per message")
+    print(f"  outcomes     {outcomes}")
+    print(f"  throughput   {total / elapsed:>10.1f} conversions/s ({elapsed:.2f}s)")
+    print(
+        f"  latency ms   mean {statistics.fmean(ms):.2f} | p50 {percentile(ms, 50):.2f} | "
+        f"p95 {percentile(ms, 95):.2f} | p99 {percentile(ms, 99):.2f} | max {max(ms):.2f}"
+    )
+    print(
+        f"  bytes/conv   sent {server.bytes_in / total:>10.0f} | received {server.bytes_out / total:>10.0f}"
+        f" | injected errors {server.errors}"
+    )
+    print(f"  requests     {dict(server.requests)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark convert_mystbin end to end against a local MystBin stand-in.")
+    parser.add_argument("--conversions", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--attachments", type=int, default=1, help="text attachments per message")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of messages repeating earlier code")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the stand-in adds to every response")
+    parser.add_argument("--jitter", type=float, default=0.01, help="up to this many extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance the stand-in answers with a 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+A local stand-in for the parts of the MystBin API the bot uses: creating, fetching and security-deleting pastes.
+
+Latency and errors can be injected to see how the bot behaves against a slow or failing instance.
+Point the bot at it with `url = "http://127.0.0.1:8080"` in the MYSTBIN config table, then run:
+
+    python -m benchmarks.mystbin_server [--port 8080] [--latency 0.05] [--jitter 0.02] [--error-rate 0.01]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import random
+import string
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Self
+
+from aiohttp import web
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from types_.mystbin import MBFileCreate, MBFileFetch, PasteCreateResp, PasteFetch
+
+
+__all__ = ("MystBinStandIn",)
+
+
+MAX_FILES: int = 5
+MAX_CHARACTERS: int = 300_000
+
+
+class MystBinStandIn:
+    """An in-memory MystBin instance served over HTTP.
+
+    Parameters
+    ----------
+    latency: float
+        Seconds added to every response. Defaults to `0.0`.
+    jitter: float
+        Up to this many extra seconds, chosen uniformly, added to every response. Defaults to `0.0`.
+    error_rate: float
+        The chance, between `0.0` and `1.0`, that a request is answered with `error_status` instead. Defaults to `0.0`.
+    error_status: int
+        The status used for injected errors. Defaults to `503`.
+    expires_in: float | None
+        Seconds until created pastes expire, or `None` for pastes that never expire. Defaults to `None`.
+    seed: int | None
+        Seeds the random source used for identifiers, jitter and errors, so runs can be reproduced.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        expires_in: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.expires_in: float | None = expires_in
+
+        self.pastes: dict[str, PasteFetch] = {}
+        self.tokens: dict[str, str] = {}
+
+        self.requests: Counter[str] = Counter()
+        self.errors: int = 0
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+
+        self._random: random.Random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self.url: str = ""
+
+        self.app: web.Application = web.Application(middlewares=[self._middleware])
+        self.app.router.add_post("/api/paste", self.create_paste, name="create")
+        self.app.router.add_get("/api/paste/{id}", self.fetch_paste, name="fetch")
+        self.app.router.add_get("/api/security/delete/{token}", self.delete_paste, name="delete")
+        self.app.router.add_get("/{id}", self.view_paste, name="view")
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def start(self, *, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving, returning the base URL. A `port` of `0` picks any free port."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+
+        site: web.TCPSite = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound: tuple[str, int] = self._runner.addresses[0][:2]
+        self.url = f"http://{bound[0]}:{bound[1]}"
+
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self) -> None:
+        """Clear the recorded counters, keeping any stored pastes."""
+        self.requests.clear()
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _identifier(self) -> str:
+        return "".join(self._random.choices(string.ascii_letters, k=16))
+
+    @web.middleware
+    async def _middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        route: str | None = request.match_info.route.name
+        self.requests[f"{request.method} {route}"] += 1
+        self.bytes_in += len(await request.read())
+
+        delay: float = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        response: web.StreamResponse
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            response = web.json_response({"error": "Injected by the stand-in server."}, status=self.error_status)
+        else:
+            response = await handler(request)
+
+        if isinstance(response, web.Response) and isinstance(response.body, bytes) and request.method != "HEAD":
+            self.bytes_out += len(response.body)
+
+        return response
+
+    def _get(self, identifier: str) -> PasteFetch | None:
+        paste: PasteFetch | None = self.pastes.get(identifier)
+        if paste is None:
+            return None
+
+        expires: str | None = paste["expires"]
+        if expires and datetime.datetime.fromisoformat(expires) <= datetime.datetime.now(datetime.UTC):
+            del self.pastes[identifier]
+            return None
+
+        return paste
+
+    async def create_paste(self, request: web.Request) -> web.Response:
+        try:
+            data: dict[str, Any] = await request.json()
+            files: list[MBFileCreate] = data["files"]
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "Invalid paste body."}, status=400)
+
+        if not 0 < len(files) <= MAX_FILES:
+            return web.json_response({"error": f"A paste must contain between 1 and {MAX_FILES} files."}, status=400)
+
+        if any(len(file.get("content", "")) > MAX_CHARACTERS for file in files):
+            return web.json_response({"error": "File content is too large."}, status=413)
+
+        now: datetime.datetime = datetime.datetime.now(datetime.UTC)
+        expires: str | None = None
+        if self.expires_in is not None:
+            expires = (now + datetime.timedelta(seconds=self.expires_in)).isoformat()
+
+        identifier: str = self._identifier()
+        safety: str = self._identifier() + self._identifier()
+
+        stored: list[MBFileFetch] = [
+            {
+                "annotation": "",
+                "charcount": len(file["content"]),
+                "content": file["content"],
+                "filename": file.get("filename", "untitled"),
+                "loc": file["content"].count("\n") + 1,
+                "parent_id": identifier,
+            }
+            for file in files
+        ]
+
+        self.pastes[identifier] = {
+            "created_at": now.isoformat(),
+            "expires": expires,
+            "files": stored,
+            "has_password": False,
+            "id": identifier,
+            "views": 0,
+        }
+        self.tokens[safety] = identifier
+
+        created: PasteCreateResp = {"created_at": now.isoformat(), "expires": expires, "id": identifier, "safety": safety}
+        return web.json_response(created)
+
+    async def fetch_paste(self, request: web.Request) -> web.Response:
+        paste: PasteFetch | None = self._get(request.match_info["id"])
+        if paste is None:
+            return web.json_response({"error": "Unknown paste."}, status=404)
+
+        if request.method == "GET":
+            paste["views"] += 1
+
+        return web.json_response(paste)
+
+    async def delete_paste(self, request: web.Request) -> web.Response:
+        identifier: str | None = self.tokens.pop(request.match_info["token"], None)
+        if identifier is None or self.pastes.pop(identifier, None) is None:
+            return web.json_response({"error": "Unknown security token."}, status=404)
+
+        return web.json_response({"deleted": identifier})
+
+    async def view_paste(self, request: web.Request) -> web.Response:
+        paste: PasteFetch | None = self._get(request.match_info["id"])
+        if paste is None:
+            return web.Response(text="Unknown paste.", status=404)
+
+        return web.Response(text="\n\n".join(f"# {file['filename']}\n{file['content']}" for file in paste["files"]))
+
+
+async def serve(server: MystBinStandIn, *, host: str, port: int) -> None:
+    url: str = await server.start(host=host, port=port)
+    print(f"MystBin stand-in listening on {url}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local MystBin stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance of answering with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--expires-in", type=float, default=None, help="seconds until created pastes expire")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server: MystBinStandIn = MystBinStandIn(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        expires_in=args.expires_in,
+        seed=args.seed,
+    )
+
+    try:
+        asyncio.run(serve(server, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
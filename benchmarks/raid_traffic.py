@@ -0,0 +1,219 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Synthetic, raid-shaped Discord traffic for `benchmarks.automod`.
+
+Long-standing members chat in the general channels throughout, and a trickle of ordinary new members join and
+chat too. Partway through a raid starts: a burst of young accounts join and post near-identical spam, with links,
+across several channels at once.
+
+Events are newline delimited JSON objects in time order, with times in seconds from the start of the trace.
+`raider` is the ground truth used to score the automod's decisions, and is optional in recorded traces:
+
+    {"t": 12.5, "type": "join", "guild": 1, "member": 2, "age": 3600.0, "raider": true}
+    {"t": 13.0, "type": "message", "guild": 1, "channel": 3, "member": 2, "content": "..."}
+
+Members who never join in the trace are treated as having joined long before it started.
+
+Run from the repository root (requires the same environment and config.toml as the bot):
+
+    python -m benchmarks.raid_traffic [--minutes 10] [--rate 3] [--raiders 40] > events.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from typing import Any
+
+from extensions.pythonista import GENERAL_CHANNELS, PYTHONISTA
+
+from .scanner import SPAM, synthesise
+
+
+CHANNELS: list[int] = sorted(GENERAL_CHANNELS)
+
+GREETINGS: list[str] = ["hey everyone", "hello guys", "yo all", "hi everybody", "attention everyone"]
+PITCHES: list[str] = [
+    "free nitro for the first 100 members, claim it before it expires",
+    "free nitro giveaway for the first 100 members claim it now before it expires",
+    "nitro is free for the first 100 members, claim yours before it expires",
+]
+DOMAINS: list[str] = ["disc0rd-gift.com", "dlscord-nitro.net", "steamcommunlty.ru", "nitro-drop.xyz"]
+
+
+def spam(rand: random.Random, *, links: int) -> str:
+    urls: str = " ".join(f"https://{rand.choice(DOMAINS)}/{rand.randrange(16**6):06x}" for _ in range(links))
+    mention: str = f" <@{rand.randrange(10**17, 10**18)}>" if rand.random() < 0.3 else ""
+
+    return f"{rand.choice(GREETINGS)}{rand.choice(('!', '!!', '', ' :)'))} {rand.choice(PITCHES)} {urls}{mention}"
+
+
+def generate(
+    *,
+    minutes: float,
+    rate: float,
+    members: int,
+    joins: float,
+    raiders: int,
+    raid_at: float,
+    burst: float,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Build a trace of `minutes` of traffic, sorted by time.
+
+    Parameters
+    ----------
+    minutes: float
+        The length of the trace.
+    rate: float
+        Messages per second from long-standing members.
+    members: int
+        How many long-standing members are chatting.
+    joins: float
+        Ordinary joins per minute. Each new member posts a few messages afterwards.
+    raiders: int
+        How many accounts join in the raid. `0` leaves the raid out.
+    raid_at: float
+        How far into the trace the raid starts, as a share of its length.
+    burst: float
+        The seconds over which the raiders join.
+    """
+    rand: random.Random = random.Random(seed)
+    duration: float = minutes * 60
+    events: list[dict[str, Any]] = []
+
+    # Chat from regulars arrives as a Poisson process, and each regular mostly stays in one channel...
+    homes: list[int] = [rand.choice(CHANNELS) for _ in range(members)]
+    chatter: list[str] = synthesise(max(1, int(duration * rate * 1.2)), seed=seed)
+
+    t: float = rand.expovariate(rate)
+    for content in chatter:
+        if t >= duration:
+            break
+
+        member: int = rand.randrange(members)
+        channel: int = homes[member] if rand.random() < 0.9 else rand.choice(CHANNELS)
+
+        events.append(
+            {
+                "t": t,
+                "type": "message",
+                "guild": PYTHONISTA,
+                "channel": channel,
+                "member": 1_000 + member,
+                "content": content,
+            }
+        )
+        t += rand.expovariate(rate)
+
+    next_id: int = 1_000_000
+    t = rand.expovariate(joins / 60) if joins else duration
+    while t < duration:
+        events.append(
+            {
+                "t": t,
+                "type": "join",
+                "guild": PYTHONISTA,
+                "member": next_id,
+                "age": rand.uniform(30, 2_000) * 86_400,
+                "raider": False,
+            }
+        )
+
+        # Ordinary new members are scored as innocent, so they never post the spam mixed into the synthetic chat...
+        posted: float = t
+        chat: list[str] = [c for c in synthesise(rand.randint(0, 4), seed=next_id) if not any(s in c for s in SPAM)]
+        for content in chat:
+            posted += rand.uniform(5, 120)
+            events.append(
+                {
+                    "t": posted,
+                    "type": "message",
+                    "guild": PYTHONISTA,
+                    "channel": rand.choice(CHANNELS),
+                    "member": next_id,
+                    "content": content,
+                }
+            )
+
+        next_id += 1
+        t += rand.expovariate(joins / 60)
+
+    start: float = duration * raid_at
+    for _ in range(raiders):
+        joined: float = start + rand.uniform(0, burst)
+        events.append(
+            {
+                "t": joined,
+                "type": "join",
+                "guild": PYTHONISTA,
+                "member": next_id,
+                "age": rand.uniform(60, 3 * 86_400),
+                "raider": True,
+            }
+        )
+
+        posted = joined
+        for _ in range(rand.randint(1, 5)):
+            posted += rand.uniform(0.5, 4)
+            links: int = rand.choice((0, 1, 1, 1, 4))
+            events.append(
+                {
+                    "t": posted,
+                    "type": "message",
+                    "guild": PYTHONISTA,
+                    "channel": rand.choice(CHANNELS),
+                    "member": next_id,
+                    "content": spam(rand, links=links),
+                }
+            )
+
+        next_id += 1
+
+    events.sort(key=lambda e: e["t"])
+    return events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic raid-shaped Discord traffic as JSONL to stdout.")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=3, help="messages per second from long-standing members")
+    parser.add_argument("--members", type=int, default=400, help="long-standing members chatting")
+    parser.add_argument("--joins", type=float, default=2, help="ordinary joins per minute")
+    parser.add_argument("--raiders", type=int, default=40, help="accounts joining in the raid, 0 for none")
+    parser.add_argument("--raid-at", type=float, default=0.5, help="when the raid starts, as a share of the trace")
+    parser.add_argument("--burst", type=float, default=20, help="seconds over which the raiders join")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    events: list[dict[str, Any]] = generate(
+        minutes=args.minutes,
+        rate=args.rate,
+        members=args.members,
+        joins=args.joins,
+        raiders=args.raiders,
+        raid_at=args.raid_at,
+        burst=args.burst,
+        seed=args.seed,
+    )
+
+    for event in events:
+        sys.stdout.write(json.dumps(event) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Benchmark for the automod `core.Scanner` against the previous content checks.
+
+By default the corpus is synthesised with a log-normal length distribution close to real chat (most messages are
+a few words, some are pasted code, a few are spam). A real corpus can be used instead, as newline delimited JSON
+strings, one message per line. Both implementations are checked to agree on every message before timing.
+
+Run from the repository root (requires the same environment and config.toml as the bot):
+
+    python -m benchmarks.scanner [--messages 20000] [--corpus messages.jsonl]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import random
+import re
+import timeit
+from typing import TYPE_CHECKING
+
+from core.automod import Scanner
+from extensions.pythonista import AI_PATTERN, DEFAULT_RULES, URL_MAX, URL_PATTERN
+
+from .codeblocks import PROSE, SNIPPET
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+LEGACY_URL: str = r"((http|https)\:\/\/)?[a-zA-Z0-9\.\/\?\:@\-_=#]+\.([a-zA-Z]){2,6}([a-zA-Z0-9\.\&\/\?\:@\-_=#])*"
+
+URL_REGEX: re.Pattern[str] = re.compile(LEGACY_URL, re.IGNORECASE)
+AI_REGEX: re.Pattern[str] = re.compile(r"\S+\.ai")
+TERMS: list[str] = DEFAULT_RULES["slurs"].get("terms", [])
+
+WORDS: list[str] = [*PROSE.split(), "asyncio", "discord.py", "await", "thanks!", "lol", "error:", "`ctx.send`"]
+LINKS: list[str] = ["https://docs.python.org/3/library/asyncio.html", "github.com/PythonistaGuild", "mystb.in/abc"]
+SPAM: list[str] = ["free nitro", "https://disc0rd-gift.com/claim", "visit promo.ai", "http://bit.ly/x", "@everyone"]
+
+
+def synthesise(count: int, *, seed: int = 0) -> list[str]:
+    rand: random.Random = random.Random(seed)
+    messages: list[str] = []
+
+    for _ in range(count):
+        length: int = min(2_000, int(rand.lognormvariate(3.8, 1.1)))
+        roll: float = rand.random()
+
+        if roll < 0.03:
+            pool: list[str] = SPAM
+        elif roll < 0.10:
+            pool = WORDS + LINKS
+        else:
+            pool = WORDS
+
+        parts: list[str] = []
+        total: int = 0
+        while total < length:
+            part: str = rand.choice(pool)
+            parts.append(part)
+            total += len(part) + 1
+
+        if length > 400 and rand.random() < 0.5:
+            parts.append(f"\n```py\n{SNIPPET}\n```")
+
+        messages.append(" ".join(parts)[: max(length, 1)])
+
+    return messages
+
+
+def legacy(content: str) -> tuple[bool, bool, int]:
+    term: bool = any(t in content for t in TERMS)
+    ai: bool = bool(AI_REGEX.findall(content))
+    urls: int = len(URL_REGEX.findall(content))
+
+    return term, ai, urls
+
+
+def build_scanner(scanner: Scanner) -> Callable[[str], tuple[bool, bool, int]]:
+    def scanned(content: str) -> tuple[bool, bool, int]:
+        scan = scanner.scan(content)
+        return scan.term(), scan.flag("ai"), scan.urls()
+
+    return scanned
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the automod scanner against the previous content checks.")
+    parser.add_argument("--messages", type=int, default=20_000, help="messages to synthesise")
+    parser.add_argument("--corpus", type=pathlib.Path, default=None, help="newline delimited JSON strings to use instead")
+    parser.add_argument("--number", type=int, default=5, help="passes over the corpus per timing run")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with args.corpus.open(encoding="UTF-8") as fp:
+            corpus: list[str] = [json.loads(line) for line in fp if line.strip()]
+    else:
+        corpus = synthesise(args.messages)
+
+    scanner: Scanner = Scanner(terms=TERMS, flags={"ai": AI_PATTERN}, url=URL_PATTERN, url_limit=URL_MAX)
+    scanned = build_scanner(scanner)
+
+    for content in corpus:
+        old: tuple[bool, bool, int] = legacy(content)
+        new: tuple[bool, bool, int] = scanned(content)
+
+        if (old[0], old[1], min(old[2], URL_MAX + 1)) != new:
+            raise RuntimeError(f"Scanner disagrees with the previous checks on {content!r}: {old} != {new}")
+
+    lengths: list[int] = sorted(len(c) for c in corpus)
+    print(
+        f"{len(corpus)} messages | median {lengths[len(lengths) // 2]} chars | "
+        f"p95 {lengths[int(len(lengths) * 0.95)]} chars | max {lengths[-1]} chars"
+    )
+
+    for name, func in (("previous", legacy), ("scanner", scanned)):
+        best: float = min(timeit.repeat(lambda f=func: [f(c) for c in corpus], number=args.number, repeat=5))
+        per: float = best / (args.number * len(corpus))
+        print(f"  {name:<10} {per * 1_000_000:>8.2f} µs/message")
+
+
+if __name__ == "__main__":
+    main()
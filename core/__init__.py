@@ -14,11 +14,28 @@ limitations under the License.
 """
 
 from . import constants as constants
+from .automod import (
+    ChannelSpread as ChannelSpread,
+    Facts as Facts,
+    MemberContext as MemberContext,
+    MemberContexts as MemberContexts,
+    NearDuplicates as NearDuplicates,
+    RaidDetector as RaidDetector,
+    Rule as Rule,
+    RuleEngine as RuleEngine,
+    Scan as Scan,
+    Scanner as Scanner,
+    Verdict as Verdict,
+)
+from .bans import BanDispatcher as BanDispatcher, BanResult as BanResult
 from .bot import Bot as Bot
 from .config import config as config
 from .enums import *
 from .fuzzy import extract_or_exact as extract_or_exact
+from .http import LatencyStats as LatencyStats, RouteLimiter as RouteLimiter, WebClient as WebClient
 from .lru import LRUCache as LRUCache
+from .timers import TimerWheel as TimerWheel
+from .timezones import Timezones as Timezones
 from .translator import Translator as Translator
-from .utils import CodeBlocks as CodeBlocks, Colour as Colour
+from .utils import CodeBlocks as CodeBlocks, Colour as Colour, stream_text as stream_text
 from .views import *
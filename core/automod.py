@@ -0,0 +1,850 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import collections
+import datetime
+import hashlib
+import itertools
+import logging
+import math
+import random
+import re
+import time
+from typing import TYPE_CHECKING, Any, Self
+
+from .config import config
+from .http import LatencyStats
+from .timers import TimerWheel
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+    import discord
+
+    from types_.config import AutoMod, AutoModRule
+
+
+__all__ = (
+    "ChannelSpread",
+    "Facts",
+    "MemberContext",
+    "MemberContexts",
+    "NearDuplicates",
+    "RaidDetector",
+    "Rule",
+    "RuleEngine",
+    "Scan",
+    "Scanner",
+    "Verdict",
+)
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+type RuleCheck = Callable[[Facts], str | None]
+type RuleFactory = Callable[[AutoModRule], RuleCheck]
+
+
+class MemberContext:
+    """What the automod remembers about a member between their updates."""
+
+    __slots__ = ("bypass_role", "role_ids")
+
+    def __init__(self, member: discord.Member, /, *, bypass_roles: frozenset[int]) -> None:
+        self.role_ids: frozenset[int] = frozenset(r.id for r in member.roles)
+        self.bypass_role: bool = not bypass_roles.isdisjoint(self.role_ids)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(roles={len(self.role_ids)}, bypass_role={self.bypass_role})"
+
+
+class MemberContexts:
+    """A `MemberContext` for each recently active member, built once and kept until the member changes.
+
+    The owner calls `invalidate` whenever a member is updated or leaves. Only the `max_size` most recently
+    used members are kept; every operation is O(1).
+    """
+
+    def __init__(self, *, bypass_roles: frozenset[int], max_size: int = 10_000) -> None:
+        self.bypass_roles: frozenset[int] = bypass_roles
+        self.max_size: int = max_size
+
+        self._contexts: collections.OrderedDict[tuple[int, int], MemberContext] = collections.OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(members={len(self)}, max_size={self.max_size})"
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def get(self, member: discord.Member, /) -> MemberContext:
+        key: tuple[int, int] = (member.guild.id, member.id)
+        context: MemberContext | None = self._contexts.get(key)
+
+        if context is not None:
+            self._contexts.move_to_end(key)
+            return context
+
+        context = self._contexts[key] = MemberContext(member, bypass_roles=self.bypass_roles)
+        if len(self._contexts) > self.max_size:
+            self._contexts.popitem(last=False)
+
+        return context
+
+    def invalidate(self, guild_id: int, member_id: int, /) -> None:
+        self._contexts.pop((guild_id, member_id), None)
+
+
+class Facts:
+    """Everything the rules know about a single message.
+
+    Each fact is computed at most once per message, no matter how many rules use it. The more expensive ones
+    (roles, permissions and anything derived from the content with `lazy`) are only computed when a rule asks,
+    and the member's roles come from their cached `MemberContext`.
+    """
+
+    __slots__ = (
+        "_bypass",
+        "_context",
+        "_contexts",
+        "_lazy",
+        "_moderator",
+        "channel_id",
+        "content",
+        "guild_id",
+        "joined_at",
+        "member",
+        "message",
+        "now",
+        "related",
+        "strict",
+    )
+
+    def __init__(
+        self,
+        message: discord.Message,
+        member: discord.Member,
+        *,
+        contexts: MemberContexts,
+        strict: bool = False,
+    ) -> None:
+        self.message: discord.Message = message
+        self.member: discord.Member = member
+        self.guild_id: int = member.guild.id
+        self.channel_id: int = message.channel.id
+        self.content: str = message.content
+        self.joined_at: datetime.datetime | None = member.joined_at
+        self.now: datetime.datetime = datetime.datetime.now(tz=datetime.UTC)
+        # Whether the guild is in strict mode after a raid...
+        self.strict: bool = strict
+
+        # Other members a rule found acting together with this one; a verdict applies to them too...
+        self.related: set[int] = set()
+
+        self._contexts: MemberContexts = contexts
+        self._context: MemberContext | None = None
+        self._moderator: bool | None = None
+        self._bypass: bool | None = None
+        self._lazy: dict[str, Any] = {}
+
+    @property
+    def context(self) -> MemberContext:
+        if self._context is None:
+            self._context = self._contexts.get(self.member)
+
+        return self._context
+
+    @property
+    def role_ids(self) -> frozenset[int]:
+        return self.context.role_ids
+
+    @property
+    def moderator(self) -> bool:
+        if self._moderator is None:
+            self._moderator = self.member.guild_permissions.kick_members
+
+        return self._moderator
+
+    @property
+    def bypass(self) -> bool:
+        """Whether the member is a moderator or holds one of the bypass roles."""
+        if self._bypass is None:
+            self._bypass = self.moderator or self.context.bypass_role
+
+        return self._bypass
+
+    def joined_within(self, hours: float, /) -> bool:
+        if not self.joined_at:
+            return False
+
+        return self.joined_at + datetime.timedelta(hours=hours) >= self.now
+
+    def lazy[T](self, name: str, compute: Callable[[Facts], T], /) -> T:
+        """Return the fact called `name`, computing it with `compute` the first time any rule asks for it."""
+        try:
+            return self._lazy[name]
+        except KeyError:
+            value: T = compute(self)
+            self._lazy[name] = value
+
+            return value
+
+
+class Scanner:
+    """The compiled content checks shared by the automod rules.
+
+    Literal terms are compiled into a single alternation, longest first, so the regex engine can skip ahead to
+    the first character of any term. Each question asked of a `Scan` is answered at most once per message and
+    stops as soon as the answer is certain: the first term or flag match, or the URL after `url_limit`.
+
+    Parameters
+    ----------
+    terms: Iterable[str]
+        Literal substrings, matched case sensitively.
+    flags: Mapping[str, str]
+        Patterns which only need to be found once, by name.
+    url: str | None
+        The pattern URLs are counted with, matched case insensitively. `None` disables URL counting.
+    url_limit: int
+        URLs are only counted up to one more than this.
+    """
+
+    def __init__(
+        self,
+        *,
+        terms: Iterable[str] = (),
+        flags: Mapping[str, str] | None = None,
+        url: str | None = None,
+        url_limit: int = 0,
+    ) -> None:
+        ordered: list[str] = sorted(set(terms), key=len, reverse=True)
+
+        self.terms: re.Pattern[str] | None = re.compile("|".join(map(re.escape, ordered))) if ordered else None
+        self.flags: dict[str, re.Pattern[str]] = {name: re.compile(p) for name, p in (flags or {}).items()}
+        self.url: re.Pattern[str] | None = re.compile(url, re.IGNORECASE) if url is not None else None
+        self.url_limit: int = url_limit
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(flags={list(self.flags)}, url_limit={self.url_limit})"
+
+    def scan(self, content: str, /) -> Scan:
+        return Scan(self, content)
+
+
+class Scan:
+    """The answers a `Scanner` has found for one message so far. See `Scanner` for details."""
+
+    __slots__ = ("_content", "_flags", "_scanner", "_term", "_urls")
+
+    def __init__(self, scanner: Scanner, content: str, /) -> None:
+        self._scanner: Scanner = scanner
+        self._content: str = content
+        self._term: bool | None = None
+        self._flags: dict[str, bool] = {}
+        self._urls: int | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(term={self._term}, flags={self._flags}, urls={self._urls})"
+
+    def term(self) -> bool:
+        """Whether any of the terms appear in the message."""
+        if self._term is None:
+            pattern: re.Pattern[str] | None = self._scanner.terms
+            self._term = pattern is not None and pattern.search(self._content) is not None
+
+        return self._term
+
+    def flag(self, name: str, /) -> bool:
+        """Whether the flag pattern `name` matches anywhere in the message."""
+        found: bool | None = self._flags.get(name)
+
+        if found is None:
+            pattern: re.Pattern[str] | None = self._scanner.flags.get(name)
+            found = self._flags[name] = pattern is not None and pattern.search(self._content) is not None
+
+        return found
+
+    def urls(self) -> int:
+        """The amount of URLs in the message, counted up to one more than `url_limit`."""
+        if self._urls is None:
+            pattern: re.Pattern[str] | None = self._scanner.url
+
+            if pattern is None:
+                self._urls = 0
+            else:
+                # Counting stops as soon as the limit is exceeded, so a wall of links is never matched in full...
+                matches = itertools.islice(pattern.finditer(self._content), self._scanner.url_limit + 1)
+                self._urls = sum(1 for _ in matches)
+
+        return self._urls
+
+
+class ChannelSpread:
+    """Counts the distinct channels each member has posted in over a sliding window.
+
+    A member is only tracked while they have posted within their window; a single timer wheel forgets everyone
+    else, so memory is bounded by recent activity rather than by every member who has ever posted.
+    """
+
+    def __init__(self, *, threshold: int, resolution: float = 0.5, clock: Callable[[], float] = time.monotonic) -> None:
+        self.threshold: int = threshold
+
+        self._clock: Callable[[], float] = clock
+        self._members: dict[int, dict[int, float]] = {}
+        self._wheel: TimerWheel[int] = TimerWheel(self._forget, resolution=resolution, clock=clock)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(threshold={self.threshold}, tracked={len(self)})"
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def start(self) -> None:
+        self._wheel.start()
+
+    async def close(self) -> None:
+        await self._wheel.close()
+
+    def _forget(self, member: int, /) -> None:
+        self._members.pop(member, None)
+
+    def advance(self, now: float | None = None, /) -> int:
+        return self._wheel.advance(now)
+
+    def observe(
+        self,
+        member: int,
+        channel: int,
+        /,
+        *,
+        window: float,
+        threshold: int | None = None,
+        now: float | None = None,
+    ) -> bool:
+        """Record a message, returning whether the member has now posted in `threshold` channels within `window` seconds.
+
+        `threshold` defaults to the one this was created with.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        now = self._clock() if now is None else now
+        channels: dict[int, float] | None = self._members.get(member)
+
+        if channels is None:
+            channels = self._members[member] = {}
+        else:
+            # Never more than `threshold` entries, so pruning is cheap...
+            cutoff: float = now - window
+            for stale in [c for c, seen in channels.items() if seen < cutoff]:
+                del channels[stale]
+
+        channels[channel] = now
+
+        if len(channels) >= threshold:
+            self._wheel.cancel(member)
+            del self._members[member]
+
+            return True
+
+        self._wheel.schedule(member, window, now=now)
+        return False
+
+
+# Words are compared after folding case and dropping mentions, numbers and punctuation...
+_NORMALISE: re.Pattern[str] = re.compile(r"<[@#][!&]?\d+>|[\W\d_]+")
+# A Mersenne prime above the 64 bit range of `hash`...
+_PRIME: int = (1 << 61) - 1
+
+
+class _Sketch:
+    __slots__ = ("at", "flagged", "guild", "keys", "member", "seq", "signature")
+
+    def __init__(
+        self, seq: int, guild: int, member: int, signature: tuple[int, ...], keys: list[tuple[Any, ...]], at: float
+    ) -> None:
+        self.seq: int = seq
+        self.guild: int = guild
+        self.member: int = member
+        self.signature: tuple[int, ...] = signature
+        self.keys: list[tuple[Any, ...]] = keys
+        self.at: float = at
+        self.flagged: bool = False
+
+
+class NearDuplicates:
+    """Finds distinct members posting near-identical messages within a sliding window.
+
+    Each message is reduced to a MinHash signature of its words, and the signature is split into `bands` of
+    `rows` values. Messages sharing any band are candidates, and a candidate matches when the share of equal
+    values in the two signatures (an estimate of the word overlap) reaches `similarity`.
+
+    Signatures live in a ring buffer of `capacity` messages and candidates are looked up through the band
+    buckets, so memory is bounded no matter the volume. Each bucket only remembers its latest `probe` messages,
+    which bounds the work per message even while a raid fills one bucket.
+
+    Once `threshold` distinct members match, they are all flagged, and any later message matching a flagged one
+    is flagged straight away. Words are hashed with a fixed 64-bit hash, so a trace replays the same in any process.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: int,
+        window: float,
+        similarity: float = 0.7,
+        bands: int = 8,
+        rows: int = 3,
+        capacity: int = 4096,
+        probe: int = 32,
+        min_words: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold: int = threshold
+        self.window: float = window
+        self.similarity: float = similarity
+        self.min_words: int = min_words
+
+        rand: random.Random = random.Random(0)
+        self._permutations: list[tuple[int, int]] = [
+            (rand.randrange(1, _PRIME), rand.randrange(_PRIME)) for _ in range(bands * rows)
+        ]
+        self._bands: int = bands
+        self._rows: int = rows
+        self._probe: int = probe
+        self._clock: Callable[[], float] = clock
+
+        self._ring: list[_Sketch | None] = [None] * capacity
+        self._words: dict[str, tuple[int, ...]] = {}
+        self._words_max: int = capacity * 8
+        self._buckets: dict[tuple[Any, ...], collections.deque[int]] = {}
+        self._seq: int = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__qualname__}(threshold={self.threshold}, window={self.window}, buckets={len(self._buckets)})"
+        )
+
+    def signature(self, content: str, /) -> tuple[int, ...] | None:
+        """The MinHash signature of a message, or `None` when it has too few distinct words to compare."""
+        words: set[str] = set(_NORMALISE.sub(" ", content[:2000].casefold()).split())
+        if len(words) < self.min_words:
+            return None
+
+        # Chat reuses the same words constantly, so each word's hashes are only computed once...
+        cache: dict[str, tuple[int, ...]] = self._words
+        columns: list[tuple[int, ...]] = []
+
+        for word in words:
+            column: tuple[int, ...] | None = cache.get(word)
+
+            if column is None:
+                if len(cache) >= self._words_max:
+                    cache.clear()
+
+                h: int = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest())
+                column = cache[word] = tuple((a * h + b) % _PRIME for a, b in self._permutations)
+
+            columns.append(column)
+
+        return tuple(map(min, zip(*columns, strict=True)))
+
+    def _matches(self, left: tuple[int, ...], right: tuple[int, ...], /) -> bool:
+        same: int = sum(x == y for x, y in zip(left, right, strict=True))
+        return same >= self.similarity * len(left)
+
+    def observe(
+        self,
+        guild: int,
+        member: int,
+        content: str,
+        /,
+        *,
+        threshold: int | None = None,
+        now: float | None = None,
+    ) -> frozenset[int]:
+        """Record a message, returning the members to act on.
+
+        This is every member of a cluster the first time it reaches `threshold`, only `member` when the message
+        matches a cluster already flagged, and empty otherwise. `threshold` defaults to the one this was created with.
+        """
+        signature: tuple[int, ...] | None = self.signature(content)
+        if signature is None:
+            return frozenset()
+
+        now = self._clock() if now is None else now
+        cutoff: float = now - self.window
+        rows: int = self._rows
+        keys: list[tuple[Any, ...]] = [(guild, b, *signature[b * rows : (b + 1) * rows]) for b in range(self._bands)]
+
+        matched: set[int] = set()
+        flagged: list[_Sketch] = []
+        seen: set[int] = set()
+        known: bool = False
+
+        for key in keys:
+            bucket: collections.deque[int] | None = self._buckets.get(key)
+            if not bucket:
+                continue
+
+            for seq in reversed(bucket):
+                if seq in seen:
+                    continue
+                seen.add(seq)
+
+                entry: _Sketch | None = self._ring[seq % len(self._ring)]
+                # Buckets are in posting order, so everything past the first stale entry is stale too...
+                if entry is None or entry.seq != seq or entry.at < cutoff:
+                    break
+
+                if not self._matches(entry.signature, signature):
+                    continue
+
+                if entry.flagged:
+                    known = True
+                    break
+
+                matched.add(entry.member)
+                flagged.append(entry)
+
+            if known:
+                break
+
+        sketch: _Sketch = self._insert(guild, member, signature, keys, now)
+
+        if known:
+            sketch.flagged = True
+            return frozenset((member,))
+
+        matched.add(member)
+        if len(matched) < (self.threshold if threshold is None else threshold):
+            return frozenset()
+
+        sketch.flagged = True
+        for entry in flagged:
+            entry.flagged = True
+
+        return frozenset(matched)
+
+    def _insert(
+        self, guild: int, member: int, signature: tuple[int, ...], keys: list[tuple[Any, ...]], now: float
+    ) -> _Sketch:
+        seq: int = self._seq
+        self._seq += 1
+
+        slot: int = seq % len(self._ring)
+        evicted: _Sketch | None = self._ring[slot]
+
+        # A bucket whose newest message is being evicted only holds evicted messages...
+        if evicted is not None:
+            for key in evicted.keys:
+                bucket: collections.deque[int] | None = self._buckets.get(key)
+                if bucket is not None and bucket[-1] <= evicted.seq:
+                    del self._buckets[key]
+
+        sketch: _Sketch = _Sketch(seq, guild, member, signature, keys, now)
+        self._ring[slot] = sketch
+
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = collections.deque(maxlen=self._probe)
+
+            bucket.append(seq)
+
+        return sketch
+
+
+class _JoinRing:
+    __slots__ = ("index", "times")
+
+    def __init__(self, size: int) -> None:
+        self.times: list[float] = [-math.inf] * size
+        self.index: int = 0
+
+    def push(self, now: float, /) -> float:
+        """Record a join, returning the time of the oldest of the last `size` joins, this one included."""
+        self.times[self.index] = now
+        self.index = (self.index + 1) % len(self.times)
+
+        return self.times[self.index]
+
+
+class RaidDetector:
+    """Watches each guild's join stream for raids.
+
+    Each guild keeps two fixed-size rings of join times: every join, and joins from accounts younger than
+    `young_age` seconds. A ring of `n` slots holds the last `n` joins, so `n` joins have happened within a window
+    exactly when the oldest join in the ring is inside it. Every join is O(1), whatever the join rate.
+
+    Parameters
+    ----------
+    joins: int
+        How many joins within `window` seconds is a raid.
+    window: float
+        See `joins`.
+    young_joins: int
+        How many joins from young accounts within `young_window` seconds is a raid.
+    young_window: float
+        See `young_joins`.
+    young_age: float
+        Accounts younger than this many seconds are young.
+    """
+
+    def __init__(
+        self,
+        *,
+        joins: int,
+        window: float,
+        young_joins: int,
+        young_window: float,
+        young_age: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.joins: int = joins
+        self.window: float = window
+        self.young_joins: int = young_joins
+        self.young_window: float = young_window
+        self.young_age: float = young_age
+
+        self._clock: Callable[[], float] = clock
+        self._all: dict[int, _JoinRing] = {}
+        self._young: dict[int, _JoinRing] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(joins={self.joins}, window={self.window}, guilds={len(self._all)})"
+
+    def observe(self, guild: int, account_age: float, /, *, now: float | None = None) -> str | None:
+        """Record a join from an account `account_age` seconds old, returning why it is part of a raid, if it is."""
+        now = self._clock() if now is None else now
+
+        ring: _JoinRing | None = self._all.get(guild)
+        if ring is None:
+            ring = self._all[guild] = _JoinRing(self.joins)
+
+        spike: bool = now - ring.push(now) <= self.window
+
+        if account_age < self.young_age:
+            young: _JoinRing | None = self._young.get(guild)
+            if young is None:
+                young = self._young[guild] = _JoinRing(self.young_joins)
+
+            if now - young.push(now) <= self.young_window:
+                return f"{self.young_joins} new accounts joined within {self.young_window:g} seconds"
+
+        if spike:
+            return f"{self.joins} joins within {self.window:g} seconds"
+
+        return None
+
+
+class Verdict:
+    __slots__ = ("reason", "related", "rule")
+
+    def __init__(self, rule: Rule, reason: str, *, related: frozenset[int] = frozenset()) -> None:
+        self.rule: Rule = rule
+        self.reason: str = reason
+        self.related: frozenset[int] = related
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(rule={self.rule.name!r}, reason={self.reason!r}, related={len(self.related)})"
+
+
+class Rule:
+    """A single automod rule.
+
+    The cheap filters (channels, bypass roles and join age) are checked by the engine before `check` runs.
+    `check` returns the reason to act on the member, or `None` to let the message through.
+    """
+
+    __slots__ = ("bypass", "channels", "check", "guilds", "hits", "joined_within", "name", "stats", "strict_joined_within")
+
+    def __init__(
+        self,
+        name: str,
+        check: RuleCheck,
+        *,
+        guilds: frozenset[int] | None = None,
+        channels: frozenset[int] | None = None,
+        bypass: bool = True,
+        joined_within: float | None = None,
+        strict_joined_within: float | None = None,
+    ) -> None:
+        self.name: str = name
+        self.check: RuleCheck = check
+        self.guilds: frozenset[int] | None = guilds
+        self.channels: frozenset[int] | None = channels
+        self.bypass: bool = bypass
+        self.joined_within: float | None = joined_within
+        self.strict_joined_within: float | None = strict_joined_within
+
+        self.hits: int = 0
+        self.stats: LatencyStats = LatencyStats()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(name={self.name!r}, hits={self.hits}, stats={self.stats!r})"
+
+    def applies(self, facts: Facts, /) -> bool:
+        # Ordered cheapest first; moderators are never subject to automod...
+        if self.channels is not None and facts.channel_id not in self.channels:
+            return False
+
+        joined_within: float | None = self.strict_joined_within if facts.strict else self.joined_within
+        if joined_within is not None and not facts.joined_within(joined_within):
+            return False
+
+        return not (facts.bypass if self.bypass else facts.moderator)
+
+
+class RuleEngine:
+    """Runs every automod rule for a guild over a message, stopping at the first rule that returns a verdict.
+
+    Rules are kept in per-guild tables built once up front. Only guilds named in some rule's `guilds` get a table,
+    and rules without `guilds` are added to every table; any other guild has no rules at all.
+    Each rule is timed in `Rule.stats`.
+
+    A guild can be put in strict mode for a while with `escalate`, usually after a raid. Rules see this
+    in `Facts.strict`, and apply to members who joined within their `strict_joined_within` instead.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Rule],
+        *,
+        bypass_roles: Iterable[int] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rules: tuple[Rule, ...] = tuple(rules)
+        self.bypass_roles: frozenset[int] = frozenset(bypass_roles)
+        self.members: MemberContexts = MemberContexts(bypass_roles=self.bypass_roles)
+
+        self._clock: Callable[[], float] = clock
+        self._strict: dict[int, float] = {}
+
+        self._tables: dict[int, tuple[Rule, ...]] = {}
+
+        for guild in {g for r in self.rules if r.guilds for g in r.guilds}:
+            self._tables[guild] = tuple(r for r in self.rules if r.guilds is None or guild in r.guilds)
+
+        # The guilds some rule was explicitly configured for...
+        self.guilds: frozenset[int] = frozenset(self._tables)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(rules={[r.name for r in self.rules]}, guilds={len(self._tables)})"
+
+    @classmethod
+    def from_config(
+        cls,
+        factories: Mapping[str, RuleFactory],
+        /,
+        *,
+        defaults: Mapping[str, AutoModRule],
+        bypass_roles: Iterable[int] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> Self:
+        """Build an engine from the `AUTOMOD` table in the config.
+
+        Parameters
+        ----------
+        factories: Mapping[str, Callable[[AutoModRule], RuleCheck]]
+            Positional only. Creates the check for each rule from its options. Rules run in this order.
+        defaults: Mapping[str, AutoModRule]
+            The options used for each rule, which the config overrides key by key.
+        bypass_roles: Iterable[int]
+            The roles exempt from rules with `bypass` set, unless the config sets its own.
+        clock: Callable[[], float]
+            The clock strict mode is timed with. Defaults to `time.monotonic`.
+        """
+        section: AutoMod = config.get("AUTOMOD", {})
+        overrides: dict[str, AutoModRule] = section.get("rules", {})
+
+        unknown: set[str] = overrides.keys() - factories.keys()
+        if unknown:
+            logger.warning("Ignoring unknown automod rules in config: %s", ", ".join(sorted(unknown)))
+
+        rules: list[Rule] = []
+        for name, factory in factories.items():
+            default: AutoModRule = defaults.get(name, {})
+            override: AutoModRule = overrides.get(name, {})
+
+            options: AutoModRule = {**default, **override}
+            options["strict"] = {**default.get("strict", {}), **override.get("strict", {})}
+            if not options.get("enabled", True):
+                continue
+
+            guilds: list[int] | None = options.get("guilds")
+            channels: list[int] | None = options.get("channels")
+            joined_within: float | None = options.get("joined_within")
+
+            rule: Rule = Rule(
+                name,
+                factory(options),
+                guilds=frozenset(guilds) if guilds is not None else None,
+                channels=frozenset(channels) if channels is not None else None,
+                bypass=options.get("bypass", True),
+                joined_within=joined_within,
+                strict_joined_within=options.get("strict", {}).get("joined_within", joined_within),
+            )
+            rules.append(rule)
+
+        return cls(rules, bypass_roles=section.get("bypass_roles", bypass_roles), clock=clock)
+
+    def rules_for(self, guild_id: int, /) -> tuple[Rule, ...]:
+        return self._tables.get(guild_id, ())
+
+    def escalate(self, guild_id: int, duration: float, /, *, now: float | None = None) -> bool:
+        """Put a guild in strict mode for `duration` seconds, or extend it. Returns whether it was not already strict."""
+        now = self._clock() if now is None else now
+        already: bool = self.strict(guild_id, now=now)
+
+        self._strict[guild_id] = max(self._strict.get(guild_id, now), now + duration)
+        return not already
+
+    def strict(self, guild_id: int, /, *, now: float | None = None) -> bool:
+        until: float | None = self._strict.get(guild_id)
+        if until is None:
+            return False
+
+        if until > (self._clock() if now is None else now):
+            return True
+
+        del self._strict[guild_id]
+        return False
+
+    def facts(self, message: discord.Message, member: discord.Member, /) -> Facts:
+        return Facts(message, member, contexts=self.members, strict=self.strict(member.guild.id))
+
+    def evaluate(self, facts: Facts, /) -> Verdict | None:
+        for rule in self.rules_for(facts.guild_id):
+            if not rule.applies(facts):
+                continue
+
+            start: float = time.perf_counter()
+            try:
+                reason: str | None = rule.check(facts)
+            except Exception as e:
+                rule.stats.record((time.perf_counter() - start) * 1000, error=True)
+                logger.exception("Automod rule %r failed: %s", rule.name, e)
+                continue
+
+            rule.stats.record((time.perf_counter() - start) * 1000)
+
+            if reason:
+                rule.hits += 1
+                return Verdict(rule, reason, related=frozenset(facts.related))
+
+        return None
@@ -0,0 +1,167 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import discord
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable, Sequence
+
+    from discord.abc import Snowflake
+
+
+__all__ = ("BanDispatcher", "BanResult")
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class BanResult:
+    __slots__ = ("elapsed", "error", "guild", "user")
+
+    def __init__(
+        self,
+        guild: discord.Guild,
+        user: Snowflake,
+        *,
+        error: discord.HTTPException | None = None,
+        elapsed: float = 0.0,
+    ) -> None:
+        self.guild: discord.Guild = guild
+        self.user: Snowflake = user
+        self.error: discord.HTTPException | None = error
+        self.elapsed: float = elapsed
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(guild={self.guild.id}, user={self.user.id}, ok={self.ok}, elapsed={self.elapsed:.2f})"
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BanDispatcher:
+    """Issues guild bans concurrently.
+
+    Bans are keyed by guild in Discord's rate limits, so bans in different guilds never wait on each other.
+    discord.py already tracks every bucket from the rate limit headers on each response, and waits on or retries
+    a bucket that is exhausted; `concurrency` only caps how many bans are in flight, to stay well under the
+    global rate limit. A ban already in flight for the same guild and user is shared rather than repeated.
+    """
+
+    def __init__(self, *, concurrency: int = 10) -> None:
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: dict[tuple[int, int], asyncio.Task[BanResult]] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(inflight={len(self._inflight)})"
+
+    async def _ban(
+        self, guild: discord.Guild, user: Snowflake, *, reason: str | None, delete_message_seconds: int
+    ) -> BanResult:
+        async with self._semaphore:
+            start: float = time.perf_counter()
+
+            try:
+                await guild.ban(user, reason=reason, delete_message_seconds=delete_message_seconds)
+            except discord.HTTPException as e:
+                return BanResult(guild, user, error=e, elapsed=time.perf_counter() - start)
+
+            return BanResult(guild, user, elapsed=time.perf_counter() - start)
+
+    async def ban(
+        self,
+        guild: discord.Guild,
+        user: Snowflake,
+        /,
+        *,
+        reason: str | None = None,
+        delete_message_seconds: int = 86400,
+    ) -> BanResult:
+        """Ban a user from a guild, returning the result instead of raising on failure.
+
+        The ban carries on even if the caller is cancelled, since other callers may be waiting on the same ban.
+        """
+        key: tuple[int, int] = (guild.id, user.id)
+        task: asyncio.Task[BanResult] | None = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.create_task(self._ban(guild, user, reason=reason, delete_message_seconds=delete_message_seconds))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self._inflight[key] = task
+
+        return await asyncio.shield(task)
+
+    async def ban_many(
+        self,
+        guilds: Iterable[discord.Guild],
+        user: Snowflake,
+        /,
+        *,
+        reason: str | None = None,
+        delete_message_seconds: int = 86400,
+        progress: Callable[[Sequence[BanResult]], Awaitable[object]] | None = None,
+        interval: float = 1.0,
+    ) -> list[BanResult]:
+        """Ban a user from every guild at once, returning a result per guild in the order they finished.
+
+        Parameters
+        ----------
+        guilds: Iterable[discord.Guild]
+            Positional only. The guilds to ban the user from.
+        user: Snowflake
+            Positional only. The user to ban.
+        reason: str | None
+            The reason shown in each guild's audit log.
+        delete_message_seconds: int
+            How much of the user's message history to delete. Defaults to one day.
+        progress: Callable[[Sequence[BanResult]], Awaitable[object]] | None
+            Called with the results so far, at most once every `interval` seconds and once more when every ban has
+            finished. Meant for editing a single progress message.
+        interval: float
+            The minimum time between calls to `progress`. Defaults to `1.0`.
+        """
+        pending: list[asyncio.Task[BanResult]] = [
+            asyncio.create_task(self.ban(g, user, reason=reason, delete_message_seconds=delete_message_seconds))
+            for g in guilds
+        ]
+        results: list[BanResult] = []
+        updated: float = time.monotonic()
+
+        for next_done in asyncio.as_completed(pending):
+            results.append(await next_done)
+
+            if progress and time.monotonic() - updated >= interval:
+                updated = time.monotonic()
+
+                try:
+                    await progress(results)
+                except discord.HTTPException as e:
+                    logger.debug("Unable to update ban progress: %s", e)
+
+        if progress:
+            try:
+                await progress(results)
+            except discord.HTTPException as e:
+                logger.debug("Unable to update ban progress: %s", e)
+
+        return results
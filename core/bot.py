@@ -18,7 +18,6 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING
 
-import aiohttp
 import discord
 import wavelink
 from discord.ext import commands
@@ -29,7 +28,9 @@ from .views import MBPasteView
 
 
 if TYPE_CHECKING:
-    from database import Database
+    from database import Backend
+
+    from .http import WebClient
 
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -37,11 +38,11 @@ logger: logging.Logger = logging.getLogger(__name__)
 
 class Bot(commands.Bot):
     colours: dict[str, str]
-    session: aiohttp.ClientSession
 
-    def __init__(self, *, database: Database, debug: bool = False) -> None:
+    def __init__(self, *, database: Backend, web: WebClient, debug: bool = False) -> None:
         self.debug = debug
         self.database = database
+        self.web = web
         self.blocked_pastes: set[int] = set()
 
         intents: discord.Intents = discord.Intents.default()
@@ -51,8 +52,6 @@ class Bot(commands.Bot):
         super().__init__(intents=intents, command_prefix=config["OPTIONS"]["prefixes"])
 
     async def setup_hook(self) -> None:
-        self.session = aiohttp.ClientSession()
-
         translator: Translator = Translator()
         await self.tree.set_translator(translator)
 
@@ -66,10 +65,9 @@ class Bot(commands.Bot):
             node: wavelink.Node = wavelink.Node(uri=uri, password=password)
             await wavelink.Pool.connect(nodes=[node], cache_capacity=1000, client=self)
 
-        self.colours = {c["hex"]: c["name"] for c in await self.database.fetch_colours()}
+        self.colours = {c["hex"]: c["name"] async for c in self.database.iter_colours()}
 
-        pastes = await self.database.fetch_all_pastes()
-        for paste in pastes:
+        async for paste in self.database.iter_all_pastes():
             self.blocked_pastes.add(paste.mid)
 
             try:
@@ -77,8 +75,7 @@ class Bot(commands.Bot):
             except Exception as e:
                 logger.warning("Paste view could not be added: %s", e)
 
-        blocks = await self.database.fetch_all_blocks()
-        for block in blocks:
+        async for block in self.database.iter_all_blocks():
             self.blocked_pastes.add(block.mid)
 
     async def on_ready(self) -> None:
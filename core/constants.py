@@ -19,6 +19,7 @@ __all__ = (
     "EQUALIZER_EMOJI",
     "LIST_EMOJI",
     "MINUS_EMOJI",
+    "MYSTBIN_URL",
     "NEXT_EMOJI",
     "PAUSE_EMOJI",
     "PLAYER_EMOJI",
@@ -42,3 +43,6 @@ REPLAY_EMOJI = "<:replay:1201200144742367343>"
 PLUS_EMOJI = "<:plus:1201200138937434212>"
 MINUS_EMOJI = "<:minus:1201200125901537332>"
 TICK_EMOJI = "✅"
+
+# The default MystBin instance; overridden by `url` in the MYSTBIN config table...
+MYSTBIN_URL = "https://mystb.in"
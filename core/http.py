@@ -0,0 +1,406 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import time
+import urllib.parse
+from collections import deque
+from typing import TYPE_CHECKING, Any, Self, cast
+
+import aiohttp
+
+from .config import config
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Callable
+
+    from types_.config import Upstream
+
+
+__all__ = ("LatencyStats", "RouteLimiter", "WebClient")
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+UPSTREAMS: dict[str, Upstream] = {
+    "mystbin": {"limit": 30, "limit_per_host": 30, "timeout": 30.0},
+    "discord": {"limit": 10, "limit_per_host": 10, "timeout": 15.0},
+    "cdn": {"limit": 20, "limit_per_host": 20, "timeout": 60.0},
+    "opencollective": {"limit": 4, "limit_per_host": 4, "timeout": 60.0},
+    "unpkg": {"limit": 2, "limit_per_host": 2, "timeout": 60.0, "keepalive": 0.0},
+}
+
+IDEMPOTENT: frozenset[str] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class _Options:
+    """The settings of one upstream, with every option missing from the config filled in with its default."""
+
+    __slots__ = (
+        "backoff",
+        "connect_timeout",
+        "dns_ttl",
+        "keepalive",
+        "limit",
+        "limit_per_host",
+        "max_retry_after",
+        "retries",
+        "timeout",
+    )
+
+    def __init__(
+        self,
+        *,
+        limit: int = 20,
+        limit_per_host: int = 10,
+        keepalive: float = 30.0,
+        dns_ttl: int = 300,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_retry_after: float = 60.0,
+    ) -> None:
+        self.limit: int = limit
+        self.limit_per_host: int = limit_per_host
+        self.keepalive: float = keepalive
+        self.dns_ttl: int = dns_ttl
+        self.timeout: float = timeout
+        self.connect_timeout: float = connect_timeout
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.max_retry_after: float = max_retry_after
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(limit={self.limit}, timeout={self.timeout}, retries={self.retries})"
+
+
+DEFAULT_OPTIONS: _Options = _Options()
+
+
+class LatencyStats:
+    """Rolling request latency for a single host, in milliseconds."""
+
+    __slots__ = ("_samples", "errors", "max", "requests", "total")
+
+    def __init__(self, *, samples: int = 512) -> None:
+        self._samples: deque[float] = deque(maxlen=samples)
+        self.requests: int = 0
+        self.errors: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__qualname__}(requests={self.requests}, errors={self.errors}, "
+            f"mean={self.mean:.2f}, p95={self.percentile(95):.2f}, max={self.max:.2f})"
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.requests if self.requests else 0.0
+
+    def record(self, elapsed: float, *, error: bool = False) -> None:
+        self.requests += 1
+        self.errors += error
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self._samples.append(elapsed)
+
+    def percentile(self, value: float, /) -> float:
+        if not self._samples:
+            return 0.0
+
+        ordered: list[float] = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * value / 100))]
+
+
+class _Bucket:
+    __slots__ = ("remaining", "reset_at")
+
+    def __init__(self) -> None:
+        self.remaining: int = 1
+        self.reset_at: float = 0.0
+
+
+class RouteLimiter:
+    """Keeps requests inside Discord's rate limits, using the `X-RateLimit-*` headers of each response.
+
+    Requests on a route wait while its bucket is exhausted until it resets, instead of running into a `429`;
+    a global rate limit pauses every route. Routes are keys chosen by the caller and should follow Discord's
+    buckets: the route and its major parameter, or the user for routes limited per user token.
+    A route is never limited before its first response, as nothing is known about it yet.
+    """
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock: Callable[[], float] = clock
+        self._buckets: dict[str, _Bucket] = {}
+        self._global: float = 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(routes={len(self._buckets)})"
+
+    async def acquire(self, route: str, /) -> None:
+        """Wait until a request can be made on `route`, and reserve it."""
+        while True:
+            now: float = self._clock()
+            bucket: _Bucket | None = self._buckets.get(route)
+
+            wait: float = self._global - now
+            if bucket is not None and bucket.remaining <= 0 and bucket.reset_at > now:
+                wait = max(wait, bucket.reset_at - now)
+
+            if wait <= 0:
+                break
+
+            await asyncio.sleep(wait)
+
+        # Concurrent callers each take one of the requests left, so a known bucket is never overrun...
+        if bucket is not None:
+            if bucket.reset_at <= now:
+                bucket.remaining = max(bucket.remaining, 1)
+
+            bucket.remaining -= 1
+
+    def update(self, route: str, resp: aiohttp.ClientResponse, /, *, retry_after: float | None = None) -> None:
+        """Record the rate limit state sent with a response on `route`. `retry_after` comes from the body of a `429`."""
+        now: float = self._clock()
+        headers = resp.headers
+
+        if retry_after is not None and (headers.get("X-RateLimit-Global") or headers.get("X-RateLimit-Scope") == "global"):
+            self._global = now + retry_after
+
+        remaining: str | None = headers.get("X-RateLimit-Remaining")
+        reset_after: str | None = headers.get("X-RateLimit-Reset-After")
+
+        if remaining is None or reset_after is None:
+            if retry_after is None:
+                return
+
+            remaining, reset_after = "0", str(retry_after)
+
+        bucket: _Bucket | None = self._buckets.get(route)
+        if bucket is None:
+            # Buckets for per-user routes pile up; drop the ones which have long since reset...
+            if len(self._buckets) >= 1024:
+                self._buckets = {r: b for r, b in self._buckets.items() if b.reset_at > now}
+
+            bucket = self._buckets[route] = _Bucket()
+
+        try:
+            bucket.remaining = int(remaining)
+            bucket.reset_at = now + float(reset_after)
+        except ValueError:
+            logger.debug("Ignoring malformed rate limit headers on %s: %s, %s", route, remaining, reset_after)
+
+
+class WebClient:
+    """The shared HTTP client used for every outbound request made by the bot.
+
+    Each upstream has its own connection pool, keep-alive, DNS cache and timeouts, configured with the `HTTP`
+    table in the config. Requests answered with `429` (or `5xx` for idempotent methods) are retried with jittered
+    exponential backoff, honouring `Retry-After` when it is sent. A `Retry-After` longer than the upstream's
+    `max_retry_after` is not waited out; the response is returned as is. Latency is recorded per host in `stats`.
+    """
+
+    def __init__(self) -> None:
+        overrides: dict[str, Upstream] = config.get("HTTP", {})
+
+        self._options: dict[str, _Options] = {}
+        for name in {*UPSTREAMS, *overrides}:
+            merged: Upstream = {**UPSTREAMS.get(name, {}), **overrides.get(name, {})}
+            self._options[name] = _Options(**merged)
+
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        self.stats: dict[str, LatencyStats] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        sessions, self._sessions = self._sessions, {}
+
+        for session in sessions.values():
+            await session.close()
+
+    def session(self, upstream: str, /) -> aiohttp.ClientSession:
+        """Return the session for an upstream, creating it on first use."""
+        session: aiohttp.ClientSession | None = self._sessions.get(upstream)
+        if session and not session.closed:
+            return session
+
+        options: _Options = self._options.get(upstream, DEFAULT_OPTIONS)
+        connector: aiohttp.TCPConnector = aiohttp.TCPConnector(
+            limit=options.limit,
+            limit_per_host=options.limit_per_host,
+            ttl_dns_cache=options.dns_ttl,
+            keepalive_timeout=options.keepalive or None,
+            force_close=not options.keepalive,
+        )
+        timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(
+            total=options.timeout,
+            connect=options.connect_timeout,
+        )
+
+        session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self._sessions[upstream] = session
+
+        return session
+
+    def _record(self, host: str, elapsed: float, *, error: bool = False) -> None:
+        stats: LatencyStats | None = self.stats.get(host)
+        if stats is None:
+            stats = self.stats[host] = LatencyStats()
+
+        stats.record(elapsed * 1000, error=error)
+
+    async def _retry_after(self, resp: aiohttp.ClientResponse, /) -> float | None:
+        """The `retry_after` in the JSON body of a `429`, which Discord sends more precisely than the header."""
+        try:
+            body: Any = await resp.json(content_type=None)
+        except (aiohttp.ClientError, ValueError):
+            return None
+
+        if not isinstance(body, dict):
+            return None
+
+        retry_after: object = cast("dict[str, object]", body).get("retry_after")
+        return float(retry_after) if isinstance(retry_after, int | float) else None
+
+    def _delay(
+        self,
+        options: _Options,
+        attempt: int,
+        resp: aiohttp.ClientResponse | None = None,
+        *,
+        retry_after: float | None = None,
+    ) -> float:
+        if retry_after is not None:
+            return retry_after
+
+        header: str | None = resp.headers.get("Retry-After") if resp is not None else None
+
+        if header:
+            try:
+                return float(header)
+            except ValueError:
+                pass
+
+        # Full jitter; spreads out retries from concurrent callers hitting the same limit...
+        return random.uniform(0, options.backoff * (2**attempt))
+
+    @contextlib.asynccontextmanager
+    async def request(
+        self,
+        upstream: str,
+        method: str,
+        url: str,
+        /,
+        *,
+        limiter: RouteLimiter | None = None,
+        route: str | None = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[aiohttp.ClientResponse]:
+        """Make a request to an upstream, retrying rate limited and failed requests where it is safe to do so.
+
+        Parameters
+        ----------
+        upstream: str
+            Positional only. The name of the upstream, which selects the connection pool and its settings.
+        method: str
+            Positional only. The HTTP method.
+        url: str
+            Positional only. The URL to request.
+        limiter: RouteLimiter | None
+            Waits on the route's rate limit before each attempt, and is updated from each response.
+        route: str | None
+            The route key for `limiter`. Defaults to the URL.
+        **kwargs
+            Passed through to `aiohttp.ClientSession.request`.
+
+        Returns
+        -------
+        aiohttp.ClientResponse
+            The response, which is released once the context manager exits.
+        """
+        session: aiohttp.ClientSession = self.session(upstream)
+        options: _Options = self._options.get(upstream, DEFAULT_OPTIONS)
+        idempotent: bool = method.upper() in IDEMPOTENT
+        host: str = urllib.parse.urlsplit(url).hostname or upstream
+        key: str = route or url
+        attempt: int = 0
+
+        while True:
+            if limiter:
+                await limiter.acquire(key)
+
+            start: float = time.perf_counter()
+
+            try:
+                resp: aiohttp.ClientResponse = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, TimeoutError):
+                self._record(host, time.perf_counter() - start, error=True)
+
+                if not idempotent or attempt >= options.retries:
+                    raise
+
+                attempt += 1
+                await asyncio.sleep(self._delay(options, attempt))
+                continue
+
+            retry: bool = resp.status == 429 or (resp.status >= 500 and idempotent)
+            self._record(host, time.perf_counter() - start, error=resp.status >= 400)
+
+            retry_after: float | None = await self._retry_after(resp) if resp.status == 429 else None
+            if limiter:
+                limiter.update(key, resp, retry_after=retry_after)
+
+            if not retry or attempt >= options.retries:
+                break
+
+            delay: float = self._delay(options, attempt + 1, resp, retry_after=retry_after)
+
+            # An upstream asking for a long wait is better answered with its error than a stalled caller...
+            if delay > options.max_retry_after:
+                logger.warning(
+                    "Not retrying %s %s after %d; asked to wait %.2fs (max %.2fs).",
+                    method,
+                    url,
+                    resp.status,
+                    delay,
+                    options.max_retry_after,
+                )
+                break
+
+            attempt += 1
+            resp.release()
+
+            logger.debug("Retrying %s %s in %.2fs after %d (attempt %d).", method, url, delay, resp.status, attempt)
+            await asyncio.sleep(delay)
+
+        try:
+            yield resp
+        finally:
+            resp.release()
@@ -80,6 +80,9 @@ class LRUCache(Generic[KT, VT]):
 
         return self._rotate(key)
 
+    def items(self) -> list[tuple[KT, VT]]:
+        return [(k, self._cache[k]) for k in self._keys]
+
     def clear(self) -> None:
         self._keys = deque()
         self._cache = {}
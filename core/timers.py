@@ -0,0 +1,146 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+
+__all__ = ("TimerWheel",)
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class TimerWheel[K: Hashable]:
+    """A hashed timer wheel, which expires any amount of keyed timers from a single sweeper task.
+
+    Scheduling, rescheduling and cancelling a timer are O(1). Each tick only looks at the timers in one slot;
+    timers further away than a full turn of the wheel stay in their slot until the turn they are due.
+    Timers fire up to `resolution` seconds late, never early.
+
+    `advance` can be called directly with an explicit time instead of starting the sweeper,
+    which lets callers drive the wheel from recorded or simulated timestamps.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[K], object],
+        *,
+        resolution: float = 0.5,
+        slots: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._callback: Callable[[K], object] = callback
+        self._resolution: float = resolution
+        self._clock: Callable[[], float] = clock
+
+        self._slots: list[dict[K, float]] = [{} for _ in range(slots)]
+        self._where: dict[K, int] = {}
+        self._tick: int = int(clock() / resolution)
+        self._task: asyncio.Task[None] | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(timers={len(self)}, slots={len(self._slots)}, resolution={self._resolution})"
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: K, /) -> bool:
+        return key in self._where
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+
+        self._task = asyncio.create_task(self._runner())
+
+    async def close(self) -> None:
+        if not self._task:
+            return
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    def schedule(self, key: K, delay: float, /, *, now: float | None = None) -> None:
+        """Fire `callback(key)` in `delay` seconds, replacing any timer already scheduled for `key`."""
+        deadline: float = (self._clock() if now is None else now) + delay
+
+        # Never place a timer in a slot the sweeper has already passed this turn...
+        tick: int = max(math.ceil(deadline / self._resolution), self._tick + 1)
+        slot: int = tick % len(self._slots)
+
+        previous: int | None = self._where.get(key)
+        if previous is not None and previous != slot:
+            del self._slots[previous][key]
+
+        self._slots[slot][key] = deadline
+        self._where[key] = slot
+
+    def cancel(self, key: K, /) -> bool:
+        slot: int | None = self._where.pop(key, None)
+        if slot is None:
+            return False
+
+        del self._slots[slot][key]
+        return True
+
+    def advance(self, now: float | None = None, /) -> int:
+        """Fire every timer due at `now`, defaulting to the current time. Returns the amount of timers fired."""
+        now = self._clock() if now is None else now
+        target: int = int(now / self._resolution)
+
+        # After a long pause every slot needs visiting, but never more than once...
+        ticks: int = min(target - self._tick, len(self._slots))
+        fired: int = 0
+
+        for tick in range(target - ticks + 1, target + 1):
+            slot: dict[K, float] = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+
+            due: list[K] = [key for key, deadline in slot.items() if deadline <= now]
+            for key in due:
+                del slot[key]
+                del self._where[key]
+
+                try:
+                    self._callback(key)
+                except Exception as e:
+                    logger.warning("Timer callback for %r failed: %s", key, e)
+
+            fired += len(due)
+
+        self._tick = max(self._tick, target)
+        return fired
+
+    async def _runner(self) -> None:
+        while True:
+            await asyncio.sleep(self._resolution)
+            self.advance()
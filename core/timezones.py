@@ -0,0 +1,228 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import zoneinfo
+from typing import TYPE_CHECKING, Literal
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+
+__all__ = ("Timezones",)
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+type TimezoneBackend = Literal["zoneinfo", "pytz"]
+
+
+# Backward compatible links from the tz database, to the zone they point at...
+LINKS: dict[str, str] = {
+    "US/Eastern": "America/New_York",
+    "US/Central": "America/Chicago",
+    "US/Mountain": "America/Denver",
+    "US/Pacific": "America/Los_Angeles",
+    "US/Alaska": "America/Anchorage",
+    "US/Hawaii": "Pacific/Honolulu",
+    "US/Arizona": "America/Phoenix",
+    "US/East-Indiana": "America/Indiana/Indianapolis",
+    "US/Michigan": "America/Detroit",
+    "Canada/Atlantic": "America/Halifax",
+    "Canada/Newfoundland": "America/St_Johns",
+    "Canada/Eastern": "America/Toronto",
+    "Canada/Central": "America/Winnipeg",
+    "Canada/Mountain": "America/Edmonton",
+    "Canada/Pacific": "America/Vancouver",
+    "Mexico/General": "America/Mexico_City",
+    "Brazil/East": "America/Sao_Paulo",
+    "GB": "Europe/London",
+    "GB-Eire": "Europe/London",
+    "Eire": "Europe/Dublin",
+    "Europe/Kiev": "Europe/Kyiv",
+    "Turkey": "Europe/Istanbul",
+    "Egypt": "Africa/Cairo",
+    "Israel": "Asia/Jerusalem",
+    "Iran": "Asia/Tehran",
+    "Asia/Calcutta": "Asia/Kolkata",
+    "Asia/Katmandu": "Asia/Kathmandu",
+    "Asia/Rangoon": "Asia/Yangon",
+    "Asia/Saigon": "Asia/Ho_Chi_Minh",
+    "PRC": "Asia/Shanghai",
+    "ROK": "Asia/Seoul",
+    "Japan": "Asia/Tokyo",
+    "Hongkong": "Asia/Hong_Kong",
+    "Singapore": "Asia/Singapore",
+    "Australia/ACT": "Australia/Sydney",
+    "Australia/NSW": "Australia/Sydney",
+    "Australia/Victoria": "Australia/Melbourne",
+    "Australia/Queensland": "Australia/Brisbane",
+    "Australia/South": "Australia/Adelaide",
+    "Australia/West": "Australia/Perth",
+    "NZ": "Pacific/Auckland",
+    "Etc/UTC": "UTC",
+    "Etc/UCT": "UTC",
+    "UCT": "UTC",
+    "Universal": "UTC",
+    "Zulu": "UTC",
+}
+
+# Abbreviations are ambiguous, so each goes to the zone most people using it mean...
+ABBREVIATIONS: dict[str, str] = {
+    "EST": "America/New_York",
+    "EDT": "America/New_York",
+    "CST": "America/Chicago",
+    "CDT": "America/Chicago",
+    "MST": "America/Denver",
+    "MDT": "America/Denver",
+    "PST": "America/Los_Angeles",
+    "PDT": "America/Los_Angeles",
+    "AKST": "America/Anchorage",
+    "AKDT": "America/Anchorage",
+    "HST": "Pacific/Honolulu",
+    "BRT": "America/Sao_Paulo",
+    "ART": "America/Argentina/Buenos_Aires",
+    "BST": "Europe/London",
+    "WET": "Europe/Lisbon",
+    "WEST": "Europe/Lisbon",
+    "CET": "Europe/Berlin",
+    "CEST": "Europe/Berlin",
+    "EET": "Europe/Athens",
+    "EEST": "Europe/Athens",
+    "MSK": "Europe/Moscow",
+    "IST": "Asia/Kolkata",
+    "PKT": "Asia/Karachi",
+    "WIB": "Asia/Jakarta",
+    "PHT": "Asia/Manila",
+    "SGT": "Asia/Singapore",
+    "HKT": "Asia/Hong_Kong",
+    "JST": "Asia/Tokyo",
+    "KST": "Asia/Seoul",
+    "AWST": "Australia/Perth",
+    "ACST": "Australia/Adelaide",
+    "ACDT": "Australia/Adelaide",
+    "AEST": "Australia/Sydney",
+    "AEDT": "Australia/Sydney",
+    "NZST": "Pacific/Auckland",
+    "NZDT": "Pacific/Auckland",
+}
+
+# Zones in these areas only exist for compatibility, so their cities never win over a canonical zone...
+LEGACY_AREAS: frozenset[str] = frozenset({"Brazil", "Canada", "Chile", "Etc", "Mexico", "SystemV", "US"})
+
+
+def _load_backend(backend: TimezoneBackend) -> tuple[frozenset[str], Callable[[str], datetime.tzinfo]]:
+    if backend == "pytz":
+        import pytz
+
+        return frozenset(pytz.all_timezones), pytz.timezone
+
+    return frozenset(zoneinfo.available_timezones()), zoneinfo.ZoneInfo
+
+
+class Timezones:
+    """Validates, resolves and caches IANA timezones.
+
+    Names are checked against a frozenset of every zone the backend knows. Anything else is looked up,
+    case-insensitively, in an alias map of backward compatible links (`US/Eastern`), common abbreviations (`PST`)
+    and city names (`new york`), which all resolve to a canonical zone name. Zones are only built once per name.
+
+    Parameters
+    ----------
+    backend: Literal["zoneinfo", "pytz"]
+        Where zones come from. `zoneinfo` is the faster of the two, but needs the system tz database or the `tzdata`
+        package. Defaults to `"pytz"`.
+    aliases: Mapping[str, str] | None
+        Extra aliases to resolve, which take precedence over the built in ones.
+    """
+
+    __slots__ = ("_aliases", "_factory", "_zones", "backend", "choices", "names")
+
+    def __init__(self, *, backend: TimezoneBackend = "pytz", aliases: Mapping[str, str] | None = None) -> None:
+        self.backend: TimezoneBackend = backend
+        self.names: frozenset[str]
+        self.names, self._factory = _load_backend(backend)
+        self.choices: tuple[str, ...] = tuple(sorted(self.names))
+
+        self._zones: dict[str, datetime.tzinfo] = {}
+        self._aliases: dict[str, str] = {}
+
+        # Later sources overwrite earlier ones, so an abbreviation wins over a legacy zone of the same name...
+        self._add_aliases(self._cities())
+        self._add_aliases((name, name) for name in self.choices)
+        self._add_aliases(LINKS.items())
+        self._add_aliases(ABBREVIATIONS.items())
+        self._add_aliases((aliases or {}).items())
+
+        logger.debug("Loaded %d timezones and %d aliases from %s.", len(self.names), len(self._aliases), backend)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(backend={self.backend!r}, names={len(self.names)}, cached={len(self._zones)})"
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def _cities(self) -> Iterable[tuple[str, str]]:
+        cities: dict[str, str] = {}
+
+        for name in self.choices:
+            area, _, city = name.rpartition("/")
+            if not area or area.partition("/")[0] in LEGACY_AREAS:
+                continue
+
+            canonical: str = LINKS.get(name, name)
+            cities.setdefault(city.replace("_", " "), canonical if canonical in self.names else name)
+
+        return cities.items()
+
+    def _add_aliases(self, aliases: Iterable[tuple[str, str]]) -> None:
+        for alias, name in aliases:
+            # Links to zones the backend does not have are dropped, rather than resolving to something unusable...
+            if name in self.names:
+                self._aliases[alias.casefold()] = name
+
+    def resolve(self, name: str, /) -> str | None:
+        """Return the canonical zone name for a zone name, link, abbreviation or city, or `None` if it is unknown."""
+        return self._aliases.get(name.strip().casefold())
+
+    def get(self, name: str, /) -> datetime.tzinfo | None:
+        """Return the zone for anything `resolve` accepts, or `None` if it is unknown."""
+        zone: datetime.tzinfo | None = self._zones.get(name)
+        if zone is not None:
+            return zone
+
+        resolved: str | None = self.resolve(name)
+        if resolved is None:
+            return None
+
+        zone = self._zones.get(resolved)
+        if zone is None:
+            zone = self._zones[resolved] = self._factory(resolved)
+
+        self._zones[name] = zone
+        return zone
+
+    def now(self, name: str, /) -> datetime.datetime | None:
+        """Return the current time in a zone, or `None` if it is unknown."""
+        zone: datetime.tzinfo | None = self.get(name)
+        if zone is None:
+            return None
+
+        return datetime.datetime.now(tz=datetime.UTC).astimezone(zone)
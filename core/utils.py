@@ -15,6 +15,7 @@ limitations under the License.
 
 from __future__ import annotations
 
+import codecs
 import colorsys
 import struct
 from typing import TYPE_CHECKING, Self
@@ -24,6 +25,70 @@ if TYPE_CHECKING:
     from types_.codeblocks import CodeBlock
     from types_.colours import Colours
 
+    from .http import WebClient
+
+
+async def stream_text(
+    web: WebClient,
+    url: str,
+    /,
+    *,
+    upstream: str = "cdn",
+    limit: int,
+    chunk_size: int = 65_536,
+    encoding: str = "UTF-8",
+) -> str:
+    """Fetch and decode the body of a response in chunks, stopping once `limit` characters have been decoded.
+
+    Only roughly `limit` characters worth of bytes are ever downloaded and held in memory,
+    regardless of how large the remote file is.
+
+    Parameters
+    ----------
+    web: WebClient
+        Positional only. The client used to make the request.
+    url: str
+        Positional only. The URL of the file to read.
+    upstream: str
+        The upstream the request is made through. Defaults to `"cdn"`.
+    limit: int
+        The maximum amount of characters to return.
+    chunk_size: int
+        The amount of bytes to read per chunk. Defaults to `65_536`.
+    encoding: str
+        The encoding used to incrementally decode the body. Defaults to `"UTF-8"`.
+
+    Returns
+    -------
+    str
+        The decoded text, at most `limit` characters long.
+
+    Raises
+    ------
+    aiohttp.ClientResponseError
+        The request did not complete successfully.
+    UnicodeDecodeError
+        The body could not be decoded with the provided encoding.
+    """
+    decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder(encoding)()
+    parts: list[str] = []
+    count: int = 0
+
+    async with web.request(upstream, "GET", url) as resp:
+        resp.raise_for_status()
+
+        async for chunk in resp.content.iter_chunked(chunk_size):
+            text: str = decoder.decode(chunk)
+            parts.append(text)
+
+            count += len(text)
+            if count >= limit:
+                break
+        else:
+            parts.append(decoder.decode(b"", final=True))
+
+    return "".join(parts)[:limit]
+
 
 class CodeBlocks:
     def __init__(self, blocks: list[CodeBlock]) -> None:
@@ -31,44 +96,84 @@ class CodeBlocks:
 
     @classmethod
     def convert(cls, content: str) -> Self:
-        splat: list[str] = content.split("\n")
+        """Class method which extracts all fenced code blocks from a string.
+
+        The string is scanned once from left to right; each block is sliced from the original string a single time.
+
+        Fences may be made of three or more backticks or tildes. A block is closed by a fence of the same character
+        which is at least as long as the one that opened it, and any text after the closing fence is scanned
+        for further blocks. Text after the opening fence is used as the language, while fences opened and closed
+        on the same line produce a block without a language. Empty and unclosed blocks are ignored.
 
-        in_block: bool = False
-        lang: str | None = None
-        lines: list[str] = []
+        Parameters
+        ----------
+        content: str
+            The string to extract code blocks from.
+
+        Returns
+        -------
+        CodeBlocks
+            The extracted code blocks, in the order they appear.
+        """
         blocks: list[CodeBlock] = []
+        find = content.find
+        startswith = content.startswith
+        length: int = len(content)
+
+        def seek(fence: str, start: int, end: int = length) -> int:
+            # Searching for a single character is a plain memchr, which is far cheaper than a multi-character search...
+            index: int = find(fence[0], start, end)
+
+            while index != -1 and not startswith(fence, index, end):
+                index = find(fence[0], index + 1, end)
+
+            return index
+
+        # The next known position of each fence type; each is only searched again once the scan has passed it...
+        ticks: int = seek("```", 0)
+        tildes: int = seek("~~~", 0)
+
+        while ticks != -1 or tildes != -1:
+            start: int = tildes if ticks == -1 or (tildes != -1 and tildes < ticks) else ticks
+            char: str = content[start]
+
+            opened: int = start + 3
+            while opened < length and content[opened] == char:
+                opened += 1
 
-        for line in splat:
-            if in_block and "```" not in line:
-                lines.append(line)
+            fence: str = content[start:opened]
+            newline: int = find("\n", opened)
 
-            elif not in_block and "```" in line:
-                lang = line[line.index("`") :].split()[0].strip("```") or None
-                line = line.replace("```", "", 1)
+            # Opened and closed on the same line, E.g. ```print("Hello")```
+            close: int = seek(fence, opened, length if newline == -1 else newline)
 
-                if "```" in line:
-                    data = line.replace("```", "")
+            if close == -1:
+                if newline == -1:
+                    break
 
-                    if data:
-                        blocks.append({"language": None, "content": data})
+                close = seek(fence, newline + 1)
+                if close == -1:
+                    break
 
-                    lang = None
-                    lines = []
-                    continue
+                body: int = newline + 1
+                end: int = close - 1 if close > body and content[close - 1] == "\n" else close
 
-                in_block = True
+                if end > body:
+                    language: str | None = content[opened:newline].strip().partition(" ")[0] or None
+                    blocks.append({"language": language, "content": content[body:end]})
 
-            elif in_block and "```" in line:
-                if not lines:
-                    continue
+            elif close > opened:
+                blocks.append({"language": None, "content": content[opened:close]})
 
-                joined: str = "\n".join(lines)
-                blocks.append({"language": lang, "content": joined})
+            position: int = close + len(fence)
+            while position < length and content[position] == char:
+                position += 1
 
-                lang = None
-                lines = []
+            if ticks != -1 and ticks < position:
+                ticks = seek("```", position)
 
-                in_block = False
+            if tildes != -1 and tildes < position:
+                tildes = seek("~~~", position)
 
         return cls(blocks)
 
@@ -331,10 +331,11 @@ class MBPasteView(ui.View):
     def __init__(self, bot: core.Bot, *, paste_id: str = "") -> None:
         self.bot: core.Bot = bot
         self.paste_id: str = paste_id
+        self.base_url: str = core.config.get("MYSTBIN", {}).get("url", core.constants.MYSTBIN_URL).rstrip("/")
 
         super().__init__(timeout=None)
 
-        url_button: ui.Button[Self] = ui.Button(label="View Paste", url=f"https://mystb.in/{paste_id}")
+        url_button: ui.Button[Self] = ui.Button(label="View Paste", url=f"{self.base_url}/{paste_id}")
         del_button: ui.Button[Self] = ui.Button(label="Delete", style=discord.ButtonStyle.red, custom_id=f"d_{paste_id}")
         del_button.callback = self.del_callback
 
@@ -345,6 +346,9 @@ class MBPasteView(ui.View):
         await interaction.response.defer(ephemeral=True)
         user: discord.User | discord.Member = interaction.user
 
+        # The paste may still be waiting in the write-behind queue...
+        await self.bot.database.writer.flush()
+
         paste: PasteRecord | None = await self.bot.database.fetch_user_paste(id=self.paste_id, uid=user.id)
         if not paste:
             await interaction.followup.send("Only the message author may delete this paste.", ephemeral=True)
@@ -363,9 +367,9 @@ class MBPasteView(ui.View):
         if not confirm.result:
             return
 
-        url: str = f"https://mystb.in/api/security/delete/{paste.token}"
+        url: str = f"{self.base_url}/api/security/delete/{paste.token}"
         try:
-            async with self.bot.session.get(url) as resp:
+            async with self.bot.web.request("mystbin", "GET", url) as resp:
                 resp.raise_for_status()
         except Exception as e:
             await interaction.followup.send(f"An unexpected error occurred, please try again: {e}", ephemeral=True)
@@ -373,6 +377,7 @@ class MBPasteView(ui.View):
 
         self.bot.blocked_pastes.add(paste.mid)
         await self.bot.database.delete_user_paste(id=self.paste_id, uid=user.id, mid=paste.mid)
+        self.bot.dispatch("paste_delete", self.paste_id)
 
         await interaction.followup.send("Successfully removed this paste and data.", ephemeral=True)
         await interaction.delete_original_response()
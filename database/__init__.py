@@ -17,36 +17,58 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import TYPE_CHECKING, Any, Self
+from typing import TYPE_CHECKING, Any
 
-import aiohttp
 import asyncpg
 
 import core
 
+from .backend import Backend as Backend
 from .models import *
+from .sqlite import SQLiteDatabase as SQLiteDatabase
+from .unit import UnitOfWork as UnitOfWork
 
 
 if TYPE_CHECKING:
+    import datetime
+    from collections.abc import AsyncIterator
+
+    from .unit import Statement
+
     _Pool = asyncpg.Pool[asyncpg.Record]
 else:
     _Pool = asyncpg.Pool
 
 
-__all__ = ("Database",)
+__all__ = ("Backend", "Database", "SQLiteDatabase", "UnitOfWork", "from_config")
 
 
 logger: logging.Logger = logging.getLogger(__name__)
 
 
-class Database:
+DEFAULT_PREFETCH: int = 500
+
+
+def from_config(*, web: core.WebClient | None = None) -> Backend:
+    """Create the storage backend selected by `DATABASE.backend` in the config. Defaults to `"postgres"`."""
+    backend: str = core.config["DATABASE"].get("backend", "postgres")
+
+    if backend == "postgres":
+        return Database(web=web)
+    elif backend == "sqlite":
+        return SQLiteDatabase(web=web)
+
+    raise RuntimeError(f'Unknown database backend "{backend}". Expected one of "postgres" or "sqlite".')
+
+
+class Database(Backend):
     pool: _Pool
 
-    async def __aenter__(self) -> Self:
-        await self.setup()
-        return self
+    def __init__(self, *, prefetch: int | None = None, web: core.WebClient | None = None) -> None:
+        self.web: core.WebClient | None = web
+        self.prefetch: int = prefetch or core.config["DATABASE"].get("prefetch", DEFAULT_PREFETCH)
 
-    async def __aexit__(self, *args: Any) -> None:
+    async def close(self) -> None:
         try:
             await asyncio.wait_for(self.pool.close(), timeout=10)
         except TimeoutError:
@@ -71,23 +93,36 @@ class Database:
         await self._refresh_colours()
         logger.info("Successfully initialised the Database.")
 
-    async def _refresh_colours(self) -> None:
-        logger.info("Refreshing colour database")
+    async def _execute_statements(self, statements: list[Statement]) -> None:
+        async with self.pool.acquire() as connection, connection.transaction():
+            for query, args in statements:
+                if len(args) == 1:
+                    await connection.execute(query, *args[0])
+                else:
+                    await connection.executemany(query, args)
+
+    async def _iter_cursor[RecordT: asyncpg.Record](
+        self,
+        query: str,
+        *args: Any,
+        record_class: type[RecordT],
+        prefetch: int | None = None,
+    ) -> AsyncIterator[RecordT]:
+        # Server-side cursors are only valid inside a transaction; rows are pulled in batches of `prefetch`...
+        async with self.pool.acquire() as connection, connection.transaction(readonly=True):
+            cursor = connection.cursor(query, *args, prefetch=prefetch or self.prefetch, record_class=record_class)
+
+            async for row in cursor:
+                yield row
+
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self._execute_statements)
+
+    async def insert_colours(self, colours: list[tuple[str, str]], /) -> None:
+        query: str = """INSERT INTO colours VALUES ($1, $2) ON CONFLICT DO NOTHING"""
 
-        URL: str = "https://unpkg.com/color-name-list@10.25.1/dist/colornames.json"
-
-        async with aiohttp.ClientSession() as session, session.get(URL) as resp:
-            try:
-                data: list[dict[str, str]] = await resp.json()
-            except Exception:
-                logger.warning("Unable to refresh colour names in database...")
-                return
-
-        query: str = """INSERT INTO colours VALUES ($1, $2) ON CONFLICT DO NOTHING RETURNING *"""
         async with self.pool.acquire() as connection:
-            await connection.executemany(query, [(r["name"], r["hex"]) for r in data])
-
-        logger.info("Successfully refreshed colour database")
+            await connection.executemany(query, colours)
 
     async def fetch_colours(self) -> list[ColourRecord]:
         query: str = """SELECT * FROM colours"""
@@ -97,6 +132,10 @@ class Database:
 
         return rows
 
+    def iter_colours(self, *, prefetch: int | None = None) -> AsyncIterator[ColourRecord]:
+        query: str = """SELECT * FROM colours"""
+        return self._iter_cursor(query, record_class=ColourRecord, prefetch=prefetch)
+
     async def fetch_colour_name_fuzzy(self, name: str, /, *, threshold: float = 70.0) -> list[ColourRecord]:
         distance: int = int((threshold * len(name)) // 100.0)
 
@@ -112,11 +151,29 @@ class Database:
 
         return rows
 
-    async def insert_user_paste(self, *, id: str, uid: int, mid: int, vid: int, token: str) -> None:
-        query: str = """INSERT INTO pastes(id, uid, mid, vid, token) VALUES($1, $2, $3, $4, $5)"""
+    async def insert_user_paste(
+        self,
+        *,
+        id: str,
+        uid: int,
+        mid: int,
+        vid: int,
+        token: str,
+        edited_at: datetime.datetime | None = None,
+        expires_at: datetime.datetime | None = None,
+        defer: bool = False,
+    ) -> None:
+        query: str = """
+        INSERT INTO pastes(id, uid, mid, vid, token, edited_at, expires_at) VALUES($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT DO NOTHING
+        """
+
+        if defer:
+            self.writer.put(query, id, uid, mid, vid, token, edited_at, expires_at, key=("pastes", id, uid))
+            return
 
         async with self.pool.acquire() as connection:
-            await connection.execute(query, id, uid, mid, vid, token)
+            await connection.execute(query, id, uid, mid, vid, token, edited_at, expires_at)
 
     async def fetch_user_paste(self, *, id: str, uid: int) -> PasteRecord | None:
         query: str = """SELECT * FROM pastes WHERE id = $1 AND uid = $2"""
@@ -126,13 +183,27 @@ class Database:
 
         return row
 
+    async def fetch_paste_by_mid(self, *, mid: int) -> PasteRecord | None:
+        query: str = """SELECT * FROM pastes WHERE mid = $1 LIMIT 1"""
+
+        async with self.pool.acquire() as connection:
+            row: PasteRecord | None = await connection.fetchrow(query, mid, record_class=PasteRecord)
+
+        return row
+
     async def delete_user_paste(self, *, id: str, uid: int, mid: int) -> None:
-        query: str = """DELETE FROM pastes WHERE id = $1 AND uid = $2"""
-        second: str = """INSERT INTO paste_blocks(mid) VALUES($1) ON CONFLICT DO NOTHING"""
+        # A single statement is atomic on its own and only costs one round trip...
+        query: str = """
+        WITH removed AS (
+            DELETE FROM pastes WHERE id = $1 AND uid = $2
+        ), digests AS (
+            DELETE FROM paste_digests WHERE id = $1
+        )
+        INSERT INTO paste_blocks(mid) VALUES($3) ON CONFLICT DO NOTHING
+        """
 
         async with self.pool.acquire() as connection:
-            await connection.execute(query, id, uid)
-            await connection.execute(second, mid)
+            await connection.execute(query, id, uid, mid)
 
     async def fetch_all_pastes(self) -> list[PasteRecord]:
         query: str = """SELECT * FROM pastes"""
@@ -150,6 +221,38 @@ class Database:
 
         return rows
 
+    def iter_all_pastes(self, *, prefetch: int | None = None) -> AsyncIterator[PasteRecord]:
+        query: str = """SELECT * FROM pastes"""
+        return self._iter_cursor(query, record_class=PasteRecord, prefetch=prefetch)
+
+    def iter_all_blocks(self, *, prefetch: int | None = None) -> AsyncIterator[PasteBlockRecord]:
+        query: str = """SELECT * FROM paste_blocks"""
+        return self._iter_cursor(query, record_class=PasteBlockRecord, prefetch=prefetch)
+
+    async def fetch_paste_digest(self, *, digest: bytes) -> PasteDigestRecord | None:
+        query: str = """SELECT * FROM paste_digests WHERE digest = $1 AND (expires_at IS NULL OR expires_at > NOW())"""
+
+        async with self.pool.acquire() as connection:
+            row: PasteDigestRecord | None = await connection.fetchrow(query, digest, record_class=PasteDigestRecord)
+
+        return row
+
+    async def insert_paste_digest(
+        self, *, digest: bytes, id: str, expires_at: datetime.datetime | None = None, defer: bool = False
+    ) -> None:
+        query: str = """
+        INSERT INTO paste_digests(digest, id, expires_at) VALUES($1, $2, $3)
+        ON CONFLICT (digest) DO UPDATE
+        SET id = EXCLUDED.id, expires_at = EXCLUDED.expires_at
+        """
+
+        if defer:
+            self.writer.put(query, digest, id, expires_at, key=("paste_digests", digest))
+            return
+
+        async with self.pool.acquire() as connection:
+            await connection.execute(query, digest, id, expires_at)
+
     async def fetch_user_timezone(self, *, uid: int) -> TimezoneRecord | None:
         query: str = """SELECT * FROM timezones WHERE uid = $1"""
 
@@ -167,3 +270,97 @@ class Database:
 
         async with self.pool.acquire() as connection:
             await connection.execute(query, uid, timezone)
+
+    def iter_collective_sync(
+        self, account_ids: list[str], /, *, prefetch: int | None = None
+    ) -> AsyncIterator[OpenCollectiveSyncRecord]:
+        query: str = """SELECT * FROM open_collective_sync WHERE account_id = ANY($1::TEXT[])"""
+        return self._iter_cursor(query, account_ids, record_class=OpenCollectiveSyncRecord, prefetch=prefetch)
+
+    def iter_expiring_collective_sync(
+        self, before: datetime.datetime, /, *, prefetch: int | None = None
+    ) -> AsyncIterator[OpenCollectiveSyncRecord]:
+        query: str = """SELECT * FROM open_collective_sync WHERE expires_at < $1 ORDER BY expires_at"""
+        return self._iter_cursor(query, before, record_class=OpenCollectiveSyncRecord, prefetch=prefetch)
+
+    async def upsert_collective_sync(
+        self,
+        *,
+        id: int,
+        name: str,
+        slug: str,
+        account_id: str,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime.datetime,
+        defer: bool = False,
+    ) -> None:
+        query: str = """
+        INSERT INTO open_collective_sync (id, name, slug, account_id, access_token, refresh_token, expires_at)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT (id) DO UPDATE
+        SET
+            name = EXCLUDED.name,
+            slug = EXCLUDED.slug,
+            account_id = EXCLUDED.account_id,
+            access_token = EXCLUDED.access_token,
+            refresh_token = EXCLUDED.refresh_token,
+            expires_at = EXCLUDED.expires_at,
+            metadata_hash = NULL
+        """
+
+        if defer:
+            self.writer.put(
+                query, id, name, slug, account_id, access_token, refresh_token, expires_at, key=("open_collective_sync", id)
+            )
+            return
+
+        async with self.pool.acquire() as connection:
+            await connection.execute(query, id, name, slug, account_id, access_token, refresh_token, expires_at)
+
+    def update_collective_tokens(
+        self,
+        *,
+        id: int,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime.datetime,
+        uow: UnitOfWork,
+    ) -> None:
+        query: str = """
+        UPDATE open_collective_sync
+        SET access_token = $1, refresh_token = $2, expires_at = $3
+        WHERE id = $4
+        """
+        uow.add(query, access_token, refresh_token, expires_at, id)
+
+    def update_collective_metadata_hash(self, *, id: int, metadata_hash: bytes, uow: UnitOfWork) -> None:
+        query: str = """UPDATE open_collective_sync SET metadata_hash = $1 WHERE id = $2"""
+        uow.add(query, metadata_hash, id)
+
+    def delete_collective_link(self, *, id: int, uow: UnitOfWork) -> None:
+        query: str = """DELETE FROM open_collective_sync WHERE id = $1"""
+        uow.add(query, id)
+
+    def delete_collective_links(self, *, ids: list[int], uow: UnitOfWork) -> None:
+        query: str = """DELETE FROM open_collective_sync WHERE id = ANY($1::BIGINT[])"""
+        uow.add(query, ids)
+
+    async def fetch_collective_checkpoint(self, *, slug: str) -> OpenCollectiveCheckpointRecord | None:
+        query: str = """SELECT * FROM open_collective_checkpoints WHERE slug = $1"""
+
+        async with self.pool.acquire() as connection:
+            row: OpenCollectiveCheckpointRecord | None = await connection.fetchrow(
+                query, slug, record_class=OpenCollectiveCheckpointRecord
+            )
+
+        return row
+
+    def set_collective_checkpoint(self, *, slug: str, created_at: datetime.datetime, uow: UnitOfWork) -> None:
+        # The checkpoint only moves forward, so a backfill never rewinds the next incremental run...
+        query: str = """
+        INSERT INTO open_collective_checkpoints(slug, last_created_at) VALUES($1, $2)
+        ON CONFLICT (slug) DO UPDATE
+        SET last_created_at = GREATEST(open_collective_checkpoints.last_created_at, EXCLUDED.last_created_at)
+        """
+        uow.add(query, slug, created_at)
@@ -0,0 +1,221 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+from typing import TYPE_CHECKING, Any, Self
+
+import core
+
+from .writer import WriteBehindQueue
+
+
+if TYPE_CHECKING:
+    import datetime
+    from collections.abc import AsyncIterator
+
+    from .models import (
+        ColourRecord,
+        OpenCollectiveCheckpointRecord,
+        OpenCollectiveSyncRecord,
+        PasteBlockRecord,
+        PasteDigestRecord,
+        PasteRecord,
+        TimezoneRecord,
+    )
+    from .unit import Statement, UnitOfWork
+
+
+__all__ = ("Backend",)
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+COLOURS_URL: str = "https://unpkg.com/color-name-list@10.25.1/dist/colornames.json"
+
+
+class Backend(abc.ABC):
+    """The storage interface used throughout the bot.
+
+    Each backend owns its connection(s) and the dialect of SQL it speaks; callers should only use the methods below.
+    """
+
+    web: core.WebClient | None
+    writer: WriteBehindQueue
+
+    async def __aenter__(self) -> Self:
+        await self.setup()
+
+        self.writer = WriteBehindQueue(
+            self._execute_statements,
+            max_size=core.config["DATABASE"].get("write_batch_size", 100),
+            interval=core.config["DATABASE"].get("write_interval", 2.0),
+        )
+        self.writer.start()
+
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        try:
+            await self.writer.close()
+        finally:
+            await self.close()
+
+    @abc.abstractmethod
+    async def setup(self) -> None: ...
+
+    @abc.abstractmethod
+    async def close(self) -> None: ...
+
+    @abc.abstractmethod
+    async def _execute_statements(self, statements: list[Statement], /) -> None: ...
+
+    @abc.abstractmethod
+    def unit_of_work(self) -> UnitOfWork: ...
+
+    async def _refresh_colours(self) -> None:
+        if self.web is None:
+            logger.info("No web client was provided, skipping the colour database refresh.")
+            return
+
+        logger.info("Refreshing colour database")
+
+        async with self.web.request("unpkg", "GET", COLOURS_URL) as resp:
+            try:
+                data: list[dict[str, str]] = await resp.json()
+            except Exception:
+                logger.warning("Unable to refresh colour names in database...")
+                return
+
+        await self.insert_colours([(r["name"], r["hex"]) for r in data])
+        logger.info("Successfully refreshed colour database")
+
+    # Colours...
+    @abc.abstractmethod
+    async def insert_colours(self, colours: list[tuple[str, str]], /) -> None: ...
+
+    @abc.abstractmethod
+    async def fetch_colours(self) -> list[ColourRecord]: ...
+
+    @abc.abstractmethod
+    def iter_colours(self, *, prefetch: int | None = None) -> AsyncIterator[ColourRecord]: ...
+
+    @abc.abstractmethod
+    async def fetch_colour_name_fuzzy(self, name: str, /, *, threshold: float = 70.0) -> list[ColourRecord]: ...
+
+    # Pastes...
+    @abc.abstractmethod
+    async def insert_user_paste(
+        self,
+        *,
+        id: str,
+        uid: int,
+        mid: int,
+        vid: int,
+        token: str,
+        edited_at: datetime.datetime | None = None,
+        expires_at: datetime.datetime | None = None,
+        defer: bool = False,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    async def fetch_user_paste(self, *, id: str, uid: int) -> PasteRecord | None: ...
+
+    @abc.abstractmethod
+    async def fetch_paste_by_mid(self, *, mid: int) -> PasteRecord | None: ...
+
+    @abc.abstractmethod
+    async def delete_user_paste(self, *, id: str, uid: int, mid: int) -> None: ...
+
+    @abc.abstractmethod
+    async def fetch_all_pastes(self) -> list[PasteRecord]: ...
+
+    @abc.abstractmethod
+    def iter_all_pastes(self, *, prefetch: int | None = None) -> AsyncIterator[PasteRecord]: ...
+
+    @abc.abstractmethod
+    async def fetch_all_blocks(self) -> list[PasteBlockRecord]: ...
+
+    @abc.abstractmethod
+    def iter_all_blocks(self, *, prefetch: int | None = None) -> AsyncIterator[PasteBlockRecord]: ...
+
+    @abc.abstractmethod
+    async def fetch_paste_digest(self, *, digest: bytes) -> PasteDigestRecord | None: ...
+
+    @abc.abstractmethod
+    async def insert_paste_digest(
+        self, *, digest: bytes, id: str, expires_at: datetime.datetime | None = None, defer: bool = False
+    ) -> None: ...
+
+    # Timezones...
+    @abc.abstractmethod
+    async def fetch_user_timezone(self, *, uid: int) -> TimezoneRecord | None: ...
+
+    @abc.abstractmethod
+    async def set_user_timezone(self, *, uid: int, timezone: str) -> None: ...
+
+    # Open Collective...
+    @abc.abstractmethod
+    def iter_collective_sync(
+        self, account_ids: list[str], /, *, prefetch: int | None = None
+    ) -> AsyncIterator[OpenCollectiveSyncRecord]: ...
+
+    @abc.abstractmethod
+    def iter_expiring_collective_sync(
+        self, before: datetime.datetime, /, *, prefetch: int | None = None
+    ) -> AsyncIterator[OpenCollectiveSyncRecord]: ...
+
+    @abc.abstractmethod
+    async def upsert_collective_sync(
+        self,
+        *,
+        id: int,
+        name: str,
+        slug: str,
+        account_id: str,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime.datetime,
+        defer: bool = False,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    def update_collective_tokens(
+        self,
+        *,
+        id: int,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime.datetime,
+        uow: UnitOfWork,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    def update_collective_metadata_hash(self, *, id: int, metadata_hash: bytes, uow: UnitOfWork) -> None: ...
+
+    @abc.abstractmethod
+    def delete_collective_link(self, *, id: int, uow: UnitOfWork) -> None: ...
+
+    @abc.abstractmethod
+    def delete_collective_links(self, *, ids: list[int], uow: UnitOfWork) -> None: ...
+
+    @abc.abstractmethod
+    async def fetch_collective_checkpoint(self, *, slug: str) -> OpenCollectiveCheckpointRecord | None: ...
+
+    @abc.abstractmethod
+    def set_collective_checkpoint(self, *, slug: str, created_at: datetime.datetime, uow: UnitOfWork) -> None: ...
@@ -13,12 +13,21 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import datetime
 from typing import Any
 
 import asyncpg
 
 
-__all__ = ("ColourRecord", "PasteBlockRecord", "PasteRecord", "TimezoneRecord")
+__all__ = (
+    "ColourRecord",
+    "OpenCollectiveCheckpointRecord",
+    "OpenCollectiveSyncRecord",
+    "PasteBlockRecord",
+    "PasteDigestRecord",
+    "PasteRecord",
+    "TimezoneRecord",
+)
 
 
 class ColourRecord(asyncpg.Record):
@@ -35,6 +44,8 @@ class PasteRecord(asyncpg.Record):
     mid: int
     vid: int
     token: str
+    edited_at: datetime.datetime | None
+    expires_at: datetime.datetime | None
 
     def __getattr__(self, attr: str) -> Any:
         return self[attr]
@@ -47,9 +58,40 @@ class PasteBlockRecord(asyncpg.Record):
         return self[attr]
 
 
+class PasteDigestRecord(asyncpg.Record):
+    digest: bytes
+    id: str
+    expires_at: datetime.datetime | None
+
+    def __getattr__(self, attr: str) -> Any:
+        return self[attr]
+
+
 class TimezoneRecord(asyncpg.Record):
     uid: int
     timezone: str
 
     def __getattr__(self, attr: str) -> Any:
         return self[attr]
+
+
+class OpenCollectiveSyncRecord(asyncpg.Record):
+    id: int
+    name: str
+    slug: str
+    account_id: str
+    refresh_token: str
+    access_token: str
+    expires_at: datetime.datetime
+    metadata_hash: bytes | None
+
+    def __getattr__(self, attr: str) -> Any:
+        return self[attr]
+
+
+class OpenCollectiveCheckpointRecord(asyncpg.Record):
+    slug: str
+    last_created_at: datetime.datetime
+
+    def __getattr__(self, attr: str) -> Any:
+        return self[attr]
@@ -0,0 +1,396 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import datetime
+import functools
+import json
+import logging
+import sqlite3
+from typing import TYPE_CHECKING, Any
+
+import core
+
+from .backend import Backend
+from .unit import UnitOfWork
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterable
+
+    from .models import (
+        ColourRecord,
+        OpenCollectiveCheckpointRecord,
+        OpenCollectiveSyncRecord,
+        PasteBlockRecord,
+        PasteDigestRecord,
+        PasteRecord,
+        TimezoneRecord,
+    )
+    from .unit import Statement
+
+
+__all__ = ("SQLiteDatabase", "SQLiteRecord")
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+DEFAULT_PATH: str = "rmysty.db"
+DEFAULT_PREFETCH: int = 500
+
+# Columns added after a table was first created; SQLite has no "ADD COLUMN IF NOT EXISTS"...
+MIGRATIONS: tuple[tuple[str, str, str], ...] = (
+    ("pastes", "edited_at", "TIMESTAMPTZ"),
+    ("pastes", "expires_at", "TIMESTAMPTZ"),
+    ("open_collective_sync", "metadata_hash", "BLOB"),
+)
+
+
+sqlite3.register_adapter(datetime.datetime, lambda dt: dt.isoformat())
+sqlite3.register_converter("TIMESTAMP", lambda b: datetime.datetime.fromisoformat(b.decode()))
+sqlite3.register_converter("TIMESTAMPTZ", lambda b: datetime.datetime.fromisoformat(b.decode()))
+
+
+class SQLiteRecord(sqlite3.Row):
+    """Row type supporting both item and attribute access, mirroring the asyncpg records used by the Postgres backend."""
+
+    def __getattr__(self, attr: str) -> Any:
+        try:
+            return self[attr]
+        except IndexError:
+            raise AttributeError(attr) from None
+
+
+def _levenshtein(one: str | None, two: str | None) -> int | None:
+    if one is None or two is None:
+        return None
+
+    if len(one) < len(two):
+        one, two = two, one
+
+    previous: list[int] = list(range(len(two) + 1))
+    for i, a in enumerate(one, 1):
+        current: list[int] = [i]
+
+        for j, b in enumerate(two, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b)))
+
+        previous = current
+
+    return previous[-1]
+
+
+class SQLiteDatabase(Backend):
+    """An in-process SQLite backend for single-node deployments, development and benchmarks.
+
+    The database runs in WAL mode and every call is executed on a single dedicated thread,
+    which owns the connection, so the event loop is never blocked on disk I/O.
+    """
+
+    _connection: sqlite3.Connection
+
+    def __init__(self, *, path: str | None = None, prefetch: int | None = None, web: core.WebClient | None = None) -> None:
+        self.web: core.WebClient | None = web
+        self.path: str = path or core.config["DATABASE"].get("path", DEFAULT_PATH)
+        self.prefetch: int = prefetch or core.config["DATABASE"].get("prefetch", DEFAULT_PREFETCH)
+
+        self._executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="rmysty-sqlite",
+        )
+
+    async def _run[T](self, func: Callable[..., T], /, *args: Any) -> T:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _connect(self) -> None:
+        connection: sqlite3.Connection = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+        )
+        connection.row_factory = SQLiteRecord
+
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.create_function("levenshtein", 2, _levenshtein, deterministic=True)
+
+        try:
+            with open("SCHEMA_SQLITE.sql") as fp:
+                connection.executescript(fp.read())
+        except OSError:
+            pass
+
+        for table, column, declaration in MIGRATIONS:
+            columns: set[str] = {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+            if column not in columns:
+                connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+        self._connection = connection
+
+    async def setup(self) -> None:
+        await self._run(self._connect)
+        await self._refresh_colours()
+
+        logger.info("Successfully initialised the SQLite Database at %s.", self.path)
+
+    async def close(self) -> None:
+        try:
+            await self._run(self._connection.close)
+        finally:
+            self._executor.shutdown(wait=False)
+
+        logger.info("Successfully closed Database connection.")
+
+    def _transaction(self, statements: list[Statement]) -> None:
+        self._connection.execute("BEGIN")
+
+        try:
+            for query, args in statements:
+                self._connection.executemany(query, args)
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+
+        self._connection.execute("COMMIT")
+
+    def _fetchall(self, query: str, args: Iterable[Any]) -> list[Any]:
+        return self._connection.execute(query, tuple(args)).fetchall()
+
+    def _fetchrow(self, query: str, args: Iterable[Any]) -> Any:
+        return self._connection.execute(query, tuple(args)).fetchone()
+
+    def _execute(self, query: str, args: Iterable[Any]) -> None:
+        self._connection.execute(query, tuple(args))
+
+    async def _iter_cursor(self, query: str, *args: Any, prefetch: int | None = None) -> AsyncIterator[Any]:
+        cursor: sqlite3.Cursor = await self._run(self._connection.execute, query, args)
+        size: int = prefetch or self.prefetch
+
+        try:
+            while rows := await self._run(cursor.fetchmany, size):
+                for row in rows:
+                    yield row
+        finally:
+            await self._run(cursor.close)
+
+    async def _execute_statements(self, statements: list[Statement]) -> None:
+        await self._run(self._transaction, statements)
+
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self._execute_statements)
+
+    async def insert_colours(self, colours: list[tuple[str, str]], /) -> None:
+        query: str = """INSERT INTO colours VALUES (?1, ?2) ON CONFLICT DO NOTHING"""
+        await self._execute_statements([(query, list(colours))])
+
+    async def fetch_colours(self) -> list[ColourRecord]:
+        query: str = """SELECT * FROM colours"""
+        return await self._run(self._fetchall, query, ())
+
+    def iter_colours(self, *, prefetch: int | None = None) -> AsyncIterator[ColourRecord]:
+        query: str = """SELECT * FROM colours"""
+        return self._iter_cursor(query, prefetch=prefetch)
+
+    async def fetch_colour_name_fuzzy(self, name: str, /, *, threshold: float = 70.0) -> list[ColourRecord]:
+        distance: int = int((threshold * len(name)) // 100.0)
+
+        # The length check is cheap and discards most rows before levenshtein is called...
+        query: str = """
+        SELECT * FROM colours
+        WHERE abs(length(name) - length(?1)) <= ?2 AND levenshtein(name, ?1) <= ?2
+        ORDER BY levenshtein(name, ?1)
+        LIMIT 20
+        """
+
+        return await self._run(self._fetchall, query, (name, distance))
+
+    async def insert_user_paste(
+        self,
+        *,
+        id: str,
+        uid: int,
+        mid: int,
+        vid: int,
+        token: str,
+        edited_at: datetime.datetime | None = None,
+        expires_at: datetime.datetime | None = None,
+        defer: bool = False,
+    ) -> None:
+        query: str = """
+        INSERT INTO pastes(id, uid, mid, vid, token, edited_at, expires_at) VALUES(?1, ?2, ?3, ?4, ?5, ?6, ?7)
+        ON CONFLICT DO NOTHING
+        """
+
+        if defer:
+            self.writer.put(query, id, uid, mid, vid, token, edited_at, expires_at, key=("pastes", id, uid))
+            return
+
+        await self._run(self._execute, query, (id, uid, mid, vid, token, edited_at, expires_at))
+
+    async def fetch_user_paste(self, *, id: str, uid: int) -> PasteRecord | None:
+        query: str = """SELECT * FROM pastes WHERE id = ?1 AND uid = ?2"""
+        return await self._run(self._fetchrow, query, (id, uid))
+
+    async def fetch_paste_by_mid(self, *, mid: int) -> PasteRecord | None:
+        query: str = """SELECT * FROM pastes WHERE mid = ?1 LIMIT 1"""
+        return await self._run(self._fetchrow, query, (mid,))
+
+    async def delete_user_paste(self, *, id: str, uid: int, mid: int) -> None:
+        query: str = """DELETE FROM pastes WHERE id = ?1 AND uid = ?2"""
+        second: str = """INSERT INTO paste_blocks(mid) VALUES(?1) ON CONFLICT DO NOTHING"""
+        third: str = """DELETE FROM paste_digests WHERE id = ?1"""
+
+        await self._execute_statements([(query, [(id, uid)]), (second, [(mid,)]), (third, [(id,)])])
+
+    async def fetch_all_pastes(self) -> list[PasteRecord]:
+        query: str = """SELECT * FROM pastes"""
+        return await self._run(self._fetchall, query, ())
+
+    async def fetch_all_blocks(self) -> list[PasteBlockRecord]:
+        query: str = """SELECT * FROM paste_blocks"""
+        return await self._run(self._fetchall, query, ())
+
+    def iter_all_pastes(self, *, prefetch: int | None = None) -> AsyncIterator[PasteRecord]:
+        query: str = """SELECT * FROM pastes"""
+        return self._iter_cursor(query, prefetch=prefetch)
+
+    def iter_all_blocks(self, *, prefetch: int | None = None) -> AsyncIterator[PasteBlockRecord]:
+        query: str = """SELECT * FROM paste_blocks"""
+        return self._iter_cursor(query, prefetch=prefetch)
+
+    async def fetch_paste_digest(self, *, digest: bytes) -> PasteDigestRecord | None:
+        query: str = """SELECT * FROM paste_digests WHERE digest = ?1 AND (expires_at IS NULL OR expires_at > ?2)"""
+        return await self._run(self._fetchrow, query, (digest, datetime.datetime.now(tz=datetime.UTC)))
+
+    async def insert_paste_digest(
+        self, *, digest: bytes, id: str, expires_at: datetime.datetime | None = None, defer: bool = False
+    ) -> None:
+        query: str = """
+        INSERT INTO paste_digests(digest, id, expires_at) VALUES(?1, ?2, ?3)
+        ON CONFLICT (digest) DO UPDATE
+        SET id = excluded.id, expires_at = excluded.expires_at
+        """
+
+        if defer:
+            self.writer.put(query, digest, id, expires_at, key=("paste_digests", digest))
+            return
+
+        await self._run(self._execute, query, (digest, id, expires_at))
+
+    async def fetch_user_timezone(self, *, uid: int) -> TimezoneRecord | None:
+        query: str = """SELECT * FROM timezones WHERE uid = ?1"""
+        return await self._run(self._fetchrow, query, (uid,))
+
+    async def set_user_timezone(self, *, uid: int, timezone: str) -> None:
+        query: str = """
+        INSERT INTO timezones(uid, timezone) VALUES(?1, ?2)
+        ON CONFLICT (uid) DO UPDATE
+        SET timezone = ?2
+        """
+
+        await self._run(self._execute, query, (uid, timezone))
+
+    def iter_collective_sync(
+        self, account_ids: list[str], /, *, prefetch: int | None = None
+    ) -> AsyncIterator[OpenCollectiveSyncRecord]:
+        query: str = """SELECT * FROM open_collective_sync WHERE account_id IN (SELECT value FROM json_each(?1))"""
+        return self._iter_cursor(query, json.dumps(account_ids), prefetch=prefetch)
+
+    def iter_expiring_collective_sync(
+        self, before: datetime.datetime, /, *, prefetch: int | None = None
+    ) -> AsyncIterator[OpenCollectiveSyncRecord]:
+        query: str = """SELECT * FROM open_collective_sync WHERE expires_at < ?1 ORDER BY expires_at"""
+        return self._iter_cursor(query, before, prefetch=prefetch)
+
+    async def upsert_collective_sync(
+        self,
+        *,
+        id: int,
+        name: str,
+        slug: str,
+        account_id: str,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime.datetime,
+        defer: bool = False,
+    ) -> None:
+        query: str = """
+        INSERT INTO open_collective_sync (id, name, slug, account_id, access_token, refresh_token, expires_at)
+        VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7)
+        ON CONFLICT (id) DO UPDATE
+        SET
+            name = excluded.name,
+            slug = excluded.slug,
+            account_id = excluded.account_id,
+            access_token = excluded.access_token,
+            refresh_token = excluded.refresh_token,
+            expires_at = excluded.expires_at,
+            metadata_hash = NULL
+        """
+
+        if defer:
+            self.writer.put(
+                query, id, name, slug, account_id, access_token, refresh_token, expires_at, key=("open_collective_sync", id)
+            )
+            return
+
+        await self._run(self._execute, query, (id, name, slug, account_id, access_token, refresh_token, expires_at))
+
+    def update_collective_tokens(
+        self,
+        *,
+        id: int,
+        access_token: str,
+        refresh_token: str,
+        expires_at: datetime.datetime,
+        uow: UnitOfWork,
+    ) -> None:
+        query: str = """
+        UPDATE open_collective_sync
+        SET access_token = ?1, refresh_token = ?2, expires_at = ?3
+        WHERE id = ?4
+        """
+        uow.add(query, access_token, refresh_token, expires_at, id)
+
+    def update_collective_metadata_hash(self, *, id: int, metadata_hash: bytes, uow: UnitOfWork) -> None:
+        query: str = """UPDATE open_collective_sync SET metadata_hash = ?1 WHERE id = ?2"""
+        uow.add(query, metadata_hash, id)
+
+    def delete_collective_link(self, *, id: int, uow: UnitOfWork) -> None:
+        query: str = """DELETE FROM open_collective_sync WHERE id = ?1"""
+        uow.add(query, id)
+
+    def delete_collective_links(self, *, ids: list[int], uow: UnitOfWork) -> None:
+        query: str = """DELETE FROM open_collective_sync WHERE id IN (SELECT value FROM json_each(?1))"""
+        uow.add(query, json.dumps(ids))
+
+    async def fetch_collective_checkpoint(self, *, slug: str) -> OpenCollectiveCheckpointRecord | None:
+        query: str = """SELECT * FROM open_collective_checkpoints WHERE slug = ?1"""
+        return await self._run(self._fetchrow, query, (slug,))
+
+    def set_collective_checkpoint(self, *, slug: str, created_at: datetime.datetime, uow: UnitOfWork) -> None:
+        # Timestamps are stored as UTC ISO 8601 text, which compares in time order...
+        query: str = """
+        INSERT INTO open_collective_checkpoints(slug, last_created_at) VALUES(?1, ?2)
+        ON CONFLICT (slug) DO UPDATE
+        SET last_created_at = MAX(last_created_at, excluded.last_created_at)
+        """
+        uow.add(query, slug, created_at.astimezone(datetime.UTC))
@@ -0,0 +1,81 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Self
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+__all__ = ("Statement", "UnitOfWork")
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+type Statement = tuple[str, list[tuple[Any, ...]]]
+
+
+class UnitOfWork:
+    """Buffers write statements and executes them atomically in a single transaction.
+
+    Consecutive statements which share the same query are grouped, so the backend can send them with one
+    `executemany` call and keep the number of round trips to a minimum.
+
+    When used as an async context manager the buffered statements are committed on a clean exit
+    and discarded if an exception was raised.
+    """
+
+    def __init__(self, executor: Callable[[list[Statement]], Awaitable[None]]) -> None:
+        self._executor: Callable[[list[Statement]], Awaitable[None]] = executor
+        self._statements: list[Statement] = []
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(statements={len(self)})"
+
+    def __len__(self) -> int:
+        return sum(len(args) for _, args in self._statements)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type: type[BaseException] | None, *args: Any) -> None:
+        if exc_type is not None:
+            self.discard()
+            return
+
+        await self.commit()
+
+    def add(self, query: str, /, *args: Any) -> None:
+        if self._statements and self._statements[-1][0] == query:
+            self._statements[-1][1].append(args)
+        else:
+            self._statements.append((query, [args]))
+
+    def discard(self) -> None:
+        self._statements = []
+
+    async def commit(self) -> None:
+        if not self._statements:
+            return
+
+        statements, self._statements = self._statements, []
+        await self._executor(statements)
+
+        logger.debug("Committed %d grouped statements in a single transaction.", len(statements))
@@ -0,0 +1,220 @@
+"""Copyright 2024 Mysty<evieepy@gmail.com>
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+    from .unit import Statement
+
+
+__all__ = ("WriteBehindQueue",)
+
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+type _Write = tuple[Hashable | None, str, tuple[Any, ...]]
+
+
+class WriteBehindQueue:
+    """A queue for idempotent or low-priority writes which are flushed to the database in batches.
+
+    A flush is triggered when `max_size` writes are pending or every `interval` seconds, whichever comes first.
+    Each flush runs in a single transaction and statements sharing a query are sent together with `executemany`.
+    When that transaction fails, each statement is retried in a transaction of its own, so a bad statement only
+    holds back its own writes (and later writes sharing their keys) until it has failed `retries` flushes in a row.
+
+    Writes sharing the same `key` are always executed in the order they were queued. Writes without a key
+    have no ordering guarantees relative to each other.
+    """
+
+    def __init__(
+        self,
+        executor: Callable[[list[Statement]], Awaitable[None]],
+        *,
+        max_size: int = 100,
+        interval: float = 2.0,
+        retries: int = 3,
+    ) -> None:
+        self._executor: Callable[[list[Statement]], Awaitable[None]] = executor
+        self._max_size: int = max_size
+        self._interval: float = interval
+        self._retries: int = retries
+
+        self._pending: list[_Write] = []
+        self._failures: int = 0
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}(pending={len(self)}, max_size={self._max_size}, interval={self._interval})"
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+
+        self._task = asyncio.create_task(self._runner())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+            self._task = None
+
+        # There is no later flush to retry in, so failed writes are retried here until they are dropped...
+        for attempt in range(self._retries):
+            if attempt:
+                await asyncio.sleep(self._interval)
+
+            await self.flush()
+
+            if not self._pending:
+                return
+
+        logger.error("Dropping %d queued writes which could not be flushed before closing.", len(self._pending))
+        self._pending.clear()
+
+    def put(self, query: str, /, *args: Any, key: Hashable | None = None) -> None:
+        self._pending.append((key, query, args))
+
+        if len(self._pending) >= self._max_size:
+            self._wakeup.set()
+
+    def _batch(self, writes: list[_Write], /) -> list[tuple[str, list[int]]]:
+        # Writes are grouped by query; a write may only join an existing group if no earlier write with the same
+        # key was placed in a later group, which keeps per-key ordering intact. Groups hold indexes into `writes`...
+        batch: list[tuple[str, list[int]]] = []
+        groups: dict[str, int] = {}
+        last: dict[Hashable, int] = {}
+
+        for position, (key, query, _) in enumerate(writes):
+            index: int | None = groups.get(query)
+
+            if index is None or (key is not None and last.get(key, -1) > index):
+                index = len(batch)
+                batch.append((query, []))
+                groups[query] = index
+
+            batch[index][1].append(position)
+
+            if key is not None:
+                last[key] = index
+
+        return batch
+
+    async def _flush_separately(self, writes: list[_Write], batch: list[tuple[str, list[int]]], /) -> set[int]:
+        # Returns the indexes of the writes which are still pending. Once a write fails, later writes sharing its
+        # key are held back without being tried, so they can't overtake it...
+        failed: set[int] = set()
+        blocked: set[Hashable] = set()
+
+        for query, positions in batch:
+            ready: list[int] = []
+
+            for position in positions:
+                key: Hashable | None = writes[position][0]
+
+                if key is not None and key in blocked:
+                    failed.add(position)
+                else:
+                    ready.append(position)
+
+            if not ready:
+                continue
+
+            try:
+                await self._executor([(query, [writes[position][2] for position in ready])])
+            except Exception as e:
+                logger.debug("Queued statement failed on its own: %s", e)
+
+                failed.update(ready)
+                blocked.update(key for key, _, _ in (writes[position] for position in ready) if key is not None)
+
+        return failed
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+
+            count: int = len(self._pending)
+            writes: list[_Write] = self._pending[:count]
+            batch: list[tuple[str, list[int]]] = self._batch(writes)
+
+            try:
+                await self._executor(
+                    [(query, [writes[position][2] for position in positions]) for query, positions in batch]
+                )
+            except Exception as e:
+                error: Exception = e
+            else:
+                self._failures = 0
+                del self._pending[:count]
+
+                logger.debug("Flushed %d queued writes in %d statements.", count, len(batch))
+                return
+
+            failed: set[int] = await self._flush_separately(writes, batch) if len(batch) > 1 else set(range(count))
+
+            # Writes queued while flushing stay behind the ones which failed...
+            self._pending[:count] = [write for position, write in enumerate(writes) if position in failed]
+
+            if not failed:
+                self._failures = 0
+                logger.debug("Flushed %d queued writes in %d separate statements.", count, len(batch))
+                return
+
+            self._failures += 1
+
+            if self._failures < self._retries:
+                logger.warning(
+                    "Failed to flush %d of %d queued writes, retrying on the next flush: %s", len(failed), count, error
+                )
+                return
+
+            logger.error("Dropping %d queued writes after %d failed flushes: %s", len(failed), self._failures, error)
+
+            self._failures = 0
+            del self._pending[: len(failed)]
+
+    async def _runner(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._interval)
+            except TimeoutError:
+                pass
+
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Unexpected error in the write-behind queue: %s", e)
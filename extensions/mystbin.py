@@ -13,7 +13,9 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import asyncio
 import datetime
+import hashlib
 from typing import TYPE_CHECKING
 
 import aiohttp
@@ -22,10 +24,11 @@ from discord import app_commands
 from discord.ext import commands
 
 import core
-from types_.mystbin import PasteFetch
 
 
 if TYPE_CHECKING:
+    from database.models import PasteDigestRecord, PasteRecord
+    from types_.config import MystBin as MystBinConfig
     from types_.mystbin import MBFileCreate, PasteCreateResp
 
 
@@ -35,14 +38,61 @@ ALLOWED_CONTEXT: app_commands.AppCommandContext = app_commands.AppCommandContext
     dm_channel=True,
     private_channel=True,
 )
-MYSTBIN_API: str = "https://mystb.in/api/paste"
-MYSTBIN_URL: str = "https://mystb.in/"
+STALE_AFTER: float = 3600.0
+MAX_FILES: int = 5
+MAX_CHARACTERS: int = 300_000
+
+# Shared by every conversion in this process, so bursts can't open an unbounded amount of downloads...
+ATTACHMENT_LIMITER: asyncio.Semaphore = asyncio.Semaphore(4)
+
+
+def _parse_timestamp(value: str | None) -> datetime.datetime | None:
+    if not value:
+        return None
+
+    return datetime.datetime.fromisoformat(value)
+
+
+def _digest(files: "list[MBFileCreate]", *, author: int, channel: int) -> bytes:
+    # Normalised so trivial differences (filename case, trailing whitespace, line endings) still match...
+    hasher = hashlib.blake2b(digest_size=16)
+
+    # Pastes also hold the message they were made from, so they're only reused for the same author and channel...
+    hasher.update(author.to_bytes(8, "little"))
+    hasher.update(channel.to_bytes(8, "little"))
+
+    for file in files:
+        filename: bytes = file.get("filename", "").strip().lower().encode()
+        content: bytes = "\n".join(line.rstrip() for line in file["content"].splitlines()).strip("\n").encode()
+
+        for part in (filename, content):
+            hasher.update(len(part).to_bytes(8, "little"))
+            hasher.update(part)
+
+    return hasher.digest()
 
 
 class Node:
-    def __init__(self, *, identifier: str, last_edit: datetime.datetime | None) -> None:
+    def __init__(
+        self,
+        *,
+        identifier: str,
+        last_edit: datetime.datetime | None,
+        created_at: datetime.datetime | None = None,
+        expires: datetime.datetime | None = None,
+    ) -> None:
         self.identifier: str = identifier
         self.last_edit: datetime.datetime | None = last_edit
+        self.expires: datetime.datetime | None = expires
+
+        # The last time we know the paste existed; None forces a check on the next hit...
+        self.checked_at: datetime.datetime | None = created_at
+
+    def expired(self, now: datetime.datetime) -> bool:
+        return self.expires is not None and now >= self.expires
+
+    def stale(self, now: datetime.datetime, *, after: float) -> bool:
+        return self.checked_at is None or (now - self.checked_at).total_seconds() >= after
 
 
 class MystBin(commands.Cog):
@@ -55,39 +105,87 @@ class MystBin(commands.Cog):
             allowed_contexts=ALLOWED_CONTEXT,
         )
 
-        self.session: aiohttp.ClientSession | None = None
         self.cache: core.LRUCache[int, Node] = core.LRUCache(50)
+        self.digests: core.LRUCache[bytes, Node] = core.LRUCache(200)
+
+        options: MystBinConfig = core.config.get("MYSTBIN", {})
+        self.stale_after: float = options.get("stale_after", STALE_AFTER)
+        self.url: str = options.get("url", core.constants.MYSTBIN_URL).rstrip("/")
+        self.api: str = f"{self.url}/api/paste"
 
     async def cog_load(self) -> None:
         self.ctxmenu.on_error = self.mystbin_error
         self.bot.tree.add_command(self.ctxmenu)
-        self.session = aiohttp.ClientSession()
 
     async def cog_unload(self) -> None:
-        if self.session:
-            try:
-                await self.session.close()
-            finally:
-                self.session = None
-
         self.bot.tree.remove_command(self.ctxmenu.name, type=self.ctxmenu.type)
 
     # @commands.hybrid_command()
     # @app_commands.allowed_installs(guilds=True, users=True)
     # async def mystbin(self, context: commands.Context[core.Bot], *, content: str) -> None: ...
 
-    async def _fetch_paste(self, identifier: str) -> PasteFetch:
-        assert self.session
+    async def _paste_exists(self, identifier: str) -> bool:
+        # HEAD avoids downloading the paste body just to confirm it still exists...
+        async with self.bot.web.request("mystbin", "HEAD", f"{self.api}/{identifier}") as resp:
+            if resp.status == 404:
+                return False
 
-        async with self.session.get(f"{MYSTBIN_API}/{identifier}") as resp:
             resp.raise_for_status()
+            return True
+
+    async def _check_node(self, node: Node, *, now: datetime.datetime) -> bool:
+        # Pastes are trusted until they expire; only check they still exist once our knowledge is stale...
+        if node.expired(now):
+            return False
+
+        if node.stale(now, after=self.stale_after):
+            exists: bool = await self._paste_exists(node.identifier)
+            node.checked_at = now
+
+            return exists
+
+        return True
+
+    async def _find_duplicate(self, digest: bytes, *, now: datetime.datetime) -> Node | None:
+        node: Node | None = self.digests.get(digest, None)
 
-            data: PasteFetch = await resp.json()
-            return data
+        if node is None:
+            record: PasteDigestRecord | None = await self.bot.database.fetch_paste_digest(digest=digest)
+            if not record:
+                return None
+
+            node = Node(identifier=record.id, last_edit=None, expires=record.expires_at)
+            self.digests[digest] = node
+
+        if not await self._check_node(node, now=now):
+            del self.digests[digest]
+            return None
+
+        return node
+
+    @commands.Cog.listener()
+    async def on_paste_delete(self, identifier: str) -> None:
+        for message_id, node in self.cache.items():
+            if node.identifier == identifier:
+                del self.cache[message_id]
+
+        for digest, node in self.digests.items():
+            if node.identifier == identifier:
+                del self.digests[digest]
+
+    async def _read_attachment(self, attachment: discord.Attachment) -> "MBFileCreate":
+        async with ATTACHMENT_LIMITER:
+            # Every UTF-8 character is at least one byte, so small files can't exceed the budget when read whole...
+            if attachment.size <= MAX_CHARACTERS:
+                content: str = (await attachment.read()).decode("UTF-8")
+            else:
+                content = await core.stream_text(self.bot.web, attachment.url, limit=MAX_CHARACTERS)
+
+        filename: str = attachment.filename.removesuffix(".txt")
+        return {"filename": filename, "content": content[:MAX_CHARACTERS]}
 
     @app_commands.checks.cooldown(2, 10.0)
     async def convert_mystbin(self, interaction: discord.Interaction[core.Bot], message: discord.Message) -> None:
-        assert self.session
         await interaction.response.defer()
 
         if message.id in self.bot.blocked_pastes and message.author.id != interaction.user.id:
@@ -97,56 +195,96 @@ class MystBin(commands.Cog):
             )
             return
 
-        # First check our cache...
+        # First check our cache, then the database, which survives restarts and cache evictions...
         # This doesn't technically save a request, but it *does* save a POST request in most cases...
         cached: Node | None = self.cache.get(message.id, None)
+        if cached is None:
+            record: PasteRecord | None = await self.bot.database.fetch_paste_by_mid(mid=message.id)
+
+            if record:
+                cached = Node(identifier=record.id, last_edit=record.edited_at, expires=record.expires_at)
+                self.cache[message.id] = cached
+
+        now: datetime.datetime = discord.utils.utcnow()
         if cached and cached.last_edit == message.edited_at:
             try:
-                paste: PasteFetch = await self._fetch_paste(cached.identifier)
+                exists: bool = await self._check_node(cached, now=now)
             except aiohttp.ClientResponseError as e:
-                if e.status != 404:
-                    await interaction.followup.send(f"An unknown error occurred fetching this paste: `{e.status}`")
-                    return
-            else:
-                await interaction.followup.send(f"{MYSTBIN_URL}{paste['id']}")
+                await interaction.followup.send(f"An unknown error occurred fetching this paste: `{e.status}`")
+                return
+
+            if exists:
+                await interaction.followup.send(f"{self.url}/{cached.identifier}")
                 return
 
         parsed: core.CodeBlocks = core.CodeBlocks.convert(message.content)
-        files: list[MBFileCreate] = []
         content: str
 
-        for attachment in message.attachments:
-            content_type: str = attachment.content_type or "text/"
+        # Only MAX_FILES files are ever uploaded, so there's no point reading any attachments past that...
+        attachments: list[discord.Attachment] = [
+            a
+            for a in message.attachments
+            if (a.content_type or "text/").startswith("text/") or a.content_type == "application/json"
+        ][:MAX_FILES]
 
-            if content_type.startswith("text/") or content_type == "application/json":
-                content = (await attachment.read()).decode("UTF-8")
-                filename: str = attachment.filename.removesuffix(".txt")
-
-                files.append({"filename": filename, "content": content[:300_000]})
+        files: list[MBFileCreate] = list(await asyncio.gather(*(self._read_attachment(a) for a in attachments)))
 
         for index, block in enumerate(parsed.blocks, 1):
             name = f"block_{index}.{block['language'] or 'txt'}"
             files.append({"filename": name, "content": block["content"]})
 
-        if len(files) < 5:
+        # Identical code posted again by the same author in the same channel reuses the paste that already exists...
+        # The message metadata differs on every message, so only the attachments and code blocks are compared...
+        digest: bytes | None = None
+        if files:
+            digest = _digest(files[:MAX_FILES], author=message.author.id, channel=message.channel.id)
+        if digest:
+            try:
+                duplicate: Node | None = await self._find_duplicate(digest, now=now)
+            except aiohttp.ClientResponseError:
+                duplicate = None
+
+            if duplicate:
+                self.cache[message.id] = Node(
+                    identifier=duplicate.identifier,
+                    last_edit=message.edited_at,
+                    created_at=now,
+                    expires=duplicate.expires,
+                )
+
+                url: str = f"{self.url}/{duplicate.identifier}"
+                await interaction.followup.send(
+                    f"{message.author.mention} the code in your message is already on [MystBin]({url})."
+                )
+                return
+
+        if len(files) < MAX_FILES:
             content = (
                 f"{message.author}({message.author.id}) in {message.channel}({message.channel.id})\n"
                 f"{message.created_at}\n\n{message.content}"
             )
             files.append({"filename": f"{message.id}.txt", "content": content})
 
-        async with self.session.post(MYSTBIN_API, json={"files": files[:5]}) as resp:
+        async with self.bot.web.request("mystbin", "POST", self.api, json={"files": files[:MAX_FILES]}) as resp:
             if resp.status != 200:
                 await interaction.followup.send(f"An error occurred creating this paste: `{resp.status}`")
                 return
 
             data: PasteCreateResp = await resp.json()
             identifier: str = data["id"]
-            url: str = f"{MYSTBIN_URL}{identifier}"
+            url = f"{self.url}/{identifier}"
             token: str = data["safety"]
 
-            node: Node = Node(identifier=identifier, last_edit=message.edited_at)
+            created_at: datetime.datetime | None = _parse_timestamp(data["created_at"])
+            expires: datetime.datetime | None = _parse_timestamp(data["expires"])
+
+            node: Node = Node(identifier=identifier, last_edit=message.edited_at, created_at=created_at, expires=expires)
             self.cache[message.id] = node
+
+            if digest:
+                self.digests[digest] = Node(identifier=identifier, last_edit=None, created_at=created_at, expires=expires)
+                await self.bot.database.insert_paste_digest(digest=digest, id=identifier, expires_at=expires, defer=True)
+
             view: core.MBPasteView = core.MBPasteView(self.bot, paste_id=identifier)
 
             msg = (
@@ -156,7 +294,14 @@ class MystBin(commands.Cog):
 
             new = await interaction.followup.send(msg, view=view, wait=True)
             await self.bot.database.insert_user_paste(
-                id=identifier, uid=message.author.id, mid=message.id, vid=new.id, token=token
+                id=identifier,
+                uid=message.author.id,
+                mid=message.id,
+                vid=new.id,
+                token=token,
+                edited_at=message.edited_at,
+                expires_at=expires,
+                defer=True,
             )
 
     async def mystbin_error(self, interaction: discord.Interaction[core.Bot], error: app_commands.AppCommandError) -> None:
@@ -10,21 +10,73 @@ file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
 from __future__ import annotations
 import traceback
-from typing import TYPE_CHECKING, Any, NamedTuple, TypedDict
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, TypedDict
 from discord.ext import commands, tasks
+import asyncio
+import collections
 import logging
 import discord
 import datetime
+import hashlib
+import json
+import hmac
 import math
+import time
 
-from core import config
+from aiohttp import web
+
+from core import RouteLimiter, config
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
     import core
+    from database import UnitOfWork
     from typing_extensions import NotRequired
 
 
 WEBHOOK_CHANNEL_ID = 1366354127088517171
+SYNC_WORKERS = 8
+
+COLLECTIVE_SLUG = 'twitchio'
+# Transactions fetched per GraphQL request...
+PAGE_SIZE = 100
+# How far back the first incremental run looks when there is no checkpoint yet...
+INITIAL_LOOKBACK = datetime.timedelta(days=2)
+# Contributors that failed to sync hold the checkpoint back for this long, after which their transactions are skipped...
+FAILED_RETRY_WINDOW = datetime.timedelta(days=3)
+# Access tokens expiring within this window are refreshed ahead of time, in batches of this size...
+TOKEN_REFRESH_LOOKAHEAD = datetime.timedelta(days=1)
+TOKEN_REFRESH_BATCH = 5
+
+# Every transaction query selects these fields, and must declare the collective as $slug...
+TRANSACTION_FRAGMENT = """
+fragment ContributorTransaction on Transaction {
+    fromAccount {
+        id
+        name
+        slug
+        memberOf (account: {slug: $slug}) {
+            nodes {
+                totalDonations {
+                    value
+                }
+                since
+            }
+        }
+    }
+    amountInHostCurrency {
+        value
+    }
+    createdAt
+}
+"""
+
+WEBHOOK_HOST = '127.0.0.1'
+WEBHOOK_PORT = 8089
+WEBHOOK_SIGNATURE_HEADER = 'X-Signature-256'
+
+SyncOutcome = Literal['synced', 'skipped', 'revoked', 'failed']
 
 _log = logging.getLogger(__name__)
 
@@ -83,6 +135,13 @@ class OpenCollectiveSyncRecord(TypedDict):
     refresh_token: str
     access_token: str
     expires_at: datetime.datetime
+    metadata_hash: bytes | None
+
+
+def role_connection_hash(payload: dict[str, Any]) -> bytes:
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode())
+    return hasher.digest()
 
 
 class Credentials(NamedTuple):
@@ -123,81 +182,173 @@ class Credentials(NamedTuple):
 
         return None
 
+    @classmethod
+    def from_payload(cls, payload: Any):
+        if not isinstance(payload, dict):
+            return None
+
+        try:
+            return cls(
+                user_id=int(payload['user_id']),
+                id=str(payload['id']),
+                name=str(payload['name']),
+                slug=str(payload['slug']),
+                access_token=str(payload['access_token']),
+                refresh_token=str(payload['refresh_token']),
+                expires_in=int(payload['expires_in']),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
 
 class OpenCollective(commands.Cog):
     def __init__(self, bot: core.Bot) -> None:
         self.bot: core.Bot = bot
+        # Shared by every sync worker, so concurrent requests wait on Discord's buckets instead of hitting 429s...
+        self.limiter: RouteLimiter = RouteLimiter()
+        # Syncs and token refreshes must not run at once, as Discord rotates the refresh token on every use...
+        self._sync_lock = asyncio.Lock()
+        self._runner: web.AppRunner | None = None
+        self._webhook_tasks: set[asyncio.Task[None]] = set()
 
     async def cog_load(self) -> None:
         self.update_contributor_metadata.start()
+        self.refresh_expiring_tokens.start()
         self.logs = await self.bot.fetch_channel(1262457734746472508)  # type: ignore
 
+        # Credentials come straight to the webhook server when it runs, otherwise from embeds in the webhook channel
+        if 'webhook' in config['OPENCOLLECTIVE']:
+            await self.start_webhook_server()
+        else:
+            self.bot.add_listener(self.on_credentials_message, 'on_message')
+
     async def cog_unload(self) -> None:
         self.update_contributor_metadata.stop()
+        self.refresh_expiring_tokens.stop()
+        self.bot.remove_listener(self.on_credentials_message, 'on_message')
 
-    async def load_collective_data(self) -> dict[str, OpenCollectiveContributor]:
-        delta = discord.utils.utcnow() - datetime.timedelta(days=2)
-        query = """
-        query collective($slug: String, $date: DateTime) {
-            collective(slug: $slug) {
-                transactions(limit: 100, type: CREDIT, dateFrom: $date) {
-                    totalCount
-                    nodes {
-                        fromAccount {
-                            id
-                            name
-                            slug
-                            memberOf (account: {slug: $slug}) {
-                                nodes {
-                                    totalDonations {
-                                        value
-                                    }
-                                    since
-                                }
-                            }
-                        }
-                        amountInHostCurrency {
-                            value
-                        }
-                        createdAt
-                    }
-                }
-            }
-        }
-        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
 
+    async def query_collective(self, query: str, variables: dict[str, Any]) -> dict[str, Any] | None:
         params = {
             'personalToken': config["OPENCOLLECTIVE"]["personal_token"],
         }
 
         payload = {
             'query': query,
-            'variables': {
-                'slug': 'twitchio',
-                'date': delta.isoformat(),
-            },
+            'variables': variables,
         }
 
-        contributors: dict[str, OpenCollectiveContributor] = {}
-        async with self.bot.session.post('https://api.opencollective.com/graphql/v2', params=params, json=payload) as resp:
+        async with self.bot.web.request(
+            'opencollective', 'POST', 'https://api.opencollective.com/graphql/v2', params=params, json=payload
+        ) as resp:
             if resp.status != 200:
-                await self.log_error(f'Failed to fetch Open Collective data: {resp.status}')
-                return {}
+                await self.log_error(f'Failed to fetch Open Collective data: {resp.status}', variables=repr(variables))
+                return None
 
             data = await resp.json()
-            transactions = data['data']['collective']['transactions']['nodes']
 
-            # These are (thankfully) already sorted by latest transaction
-            for transaction in transactions:
+        return data['data']
+
+    async def iter_transaction_pages(self, since: datetime.datetime | None) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield pages of credit transactions made at or after `since`, oldest first. `None` yields the full history.
+
+        Pages are requested by offset as they are consumed. Oldest first keeps the offsets stable while new
+        transactions arrive, as they are only ever appended to the end.
+        """
+        query = """
+        query collective($slug: String, $date: DateTime, $limit: Int, $offset: Int) {
+            collective(slug: $slug) {
+                transactions(
+                    limit: $limit,
+                    offset: $offset,
+                    type: CREDIT,
+                    dateFrom: $date,
+                    orderBy: {field: CREATED_AT, direction: ASC}
+                ) {
+                    totalCount
+                    nodes {
+                        ...ContributorTransaction
+                    }
+                }
+            }
+        }
+        """ + TRANSACTION_FRAGMENT
+
+        offset = 0
+        while True:
+            variables = {
+                'slug': COLLECTIVE_SLUG,
+                'date': since.isoformat() if since else None,
+                'limit': PAGE_SIZE,
+                'offset': offset,
+            }
+
+            data = await self.query_collective(query, variables)
+            if data is None:
+                return
+
+            transactions = data['collective']['transactions']
+            nodes = transactions['nodes']
+            if not nodes:
+                return
+
+            yield nodes
+
+            offset += len(nodes)
+            if offset >= transactions['totalCount']:
+                return
+
+    async def load_collective_data(
+        self, since: datetime.datetime | None
+    ) -> tuple[dict[str, OpenCollectiveContributor], datetime.datetime | None]:
+        """Load the latest transaction of every contributor since `since`, with the `createdAt` of the newest one seen.
+
+        If a page fails to load this returns what was loaded before it, and the `createdAt` only covers those pages.
+        """
+        contributors: dict[str, OpenCollectiveContributor] = {}
+        latest = None
+
+        async for page in self.iter_transaction_pages(since):
+            for transaction in page:
                 member = OpenCollectiveContributor(transaction)
 
-                # If we already registered this one then skip it
-                if member.id in contributors:
+                # dateFrom is inclusive, so the transaction at the checkpoint comes back again
+                if since is not None and member.last_donation <= since:
                     continue
 
+                # Oldest first, so a later transaction from the same account replaces the earlier one
                 contributors[member.id] = member
+                if latest is None or member.last_donation > latest:
+                    latest = member.last_donation
+
+        return contributors, latest
+
+    async def load_contributor(self, account_slug: str) -> OpenCollectiveContributor | None:
+        """Load the latest transaction from a single account to the collective, if it has made one."""
+        query = """
+        query contributor($slug: String, $account: String) {
+            transactions(
+                account: {slug: $slug},
+                fromAccount: {slug: $account},
+                type: CREDIT,
+                limit: 1,
+                orderBy: {field: CREATED_AT, direction: DESC}
+            ) {
+                nodes {
+                    ...ContributorTransaction
+                }
+            }
+        }
+        """ + TRANSACTION_FRAGMENT
 
-        return contributors
+        data = await self.query_collective(query, {'slug': COLLECTIVE_SLUG, 'account': account_slug})
+        if data is None or not data['transactions']['nodes']:
+            return None
+
+        return OpenCollectiveContributor(data['transactions']['nodes'][0])
 
     async def refresh_access_token(self, record: OpenCollectiveSyncRecord) -> DiscordTokenResponse:
         url = 'https://discord.com/api/v10/oauth2/token'
@@ -212,7 +363,9 @@ class OpenCollective(commands.Cog):
             'Content-Type': 'application/x-www-form-urlencoded',
         }
 
-        async with self.bot.session.post(url, data=data, headers=headers) as resp:
+        async with self.bot.web.request(
+            'discord', 'POST', url, data=data, headers=headers, limiter=self.limiter, route='oauth2/token'
+        ) as resp:
             data = await resp.json()
             if resp.status != 200 and 'error' in data and data['error'] == 'invalid_grant':
                 raise TokenRevoked
@@ -222,68 +375,254 @@ class OpenCollective(commands.Cog):
 
             return data
 
-    async def update_contributor_access_tokens(self, tokens: DiscordTokenResponse, user_id: int) -> None:
-        query = """UPDATE open_collective_sync
-                   SET access_token = $1, refresh_token = $2, expires_at = $3
-                   WHERE id = $4
-                """
-
+    def update_contributor_access_tokens(self, tokens: DiscordTokenResponse, user_id: int, *, uow: UnitOfWork) -> None:
         expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=tokens['expires_in'])
-        await self.bot.database.pool.execute(query, tokens['access_token'], tokens['refresh_token'], expires_at, user_id)
+        self.bot.database.update_collective_tokens(
+            id=user_id,
+            access_token=tokens['access_token'],
+            refresh_token=tokens['refresh_token'],
+            expires_at=expires_at,
+            uow=uow,
+        )
 
-    async def delete_contributor_link(self, user_id: int) -> None:
-        query = "DELETE FROM open_collective_sync WHERE id = $1"
-        await self.bot.database.pool.execute(query, user_id)
+    def delete_contributor_link(self, user_id: int, *, uow: UnitOfWork) -> None:
+        self.bot.database.delete_collective_link(id=user_id, uow=uow)
 
-    async def sync_contributor(self, record: OpenCollectiveSyncRecord, contributor: OpenCollectiveContributor) -> None:
-        now = datetime.datetime.utcnow()
-        access_token = record['access_token']
-        if now > record['expires_at']:
+    @tasks.loop(hours=1)
+    async def refresh_expiring_tokens(self) -> None:
+        async with self._sync_lock:
+            await self._refresh_expiring_tokens()
+
+    async def _refresh_expiring_tokens(self) -> None:
+        before = datetime.datetime.utcnow() + TOKEN_REFRESH_LOOKAHEAD
+        records = [record async for record in self.bot.database.iter_expiring_collective_sync(before)]
+        if not records:
+            return
+
+        refreshed: list[tuple[int, DiscordTokenResponse]] = []
+        revoked: list[int] = []
+        failed = 0
+        saved = 0
+        pruned = 0
+
+        async def refresh(record: OpenCollectiveSyncRecord) -> None:
+            nonlocal failed
             try:
                 tokens = await self.refresh_access_token(record)
             except TokenRevoked:
-                await self.delete_contributor_link(record['id'])
+                revoked.append(record['id'])
             except Exception as e:
-                # Unknown error, just skip for now.
+                failed += 1
                 await self.log_error('Unknown error while refreshing access token', error=e, record=repr(record))
-                return
             else:
-                access_token = tokens['access_token']
-                await self.update_contributor_access_tokens(tokens, record['id'])
+                refreshed.append((record['id'], tokens))
 
+        start = time.perf_counter()
+        # Small batches share the oauth2/token bucket, so a backlog of expiring tokens never arrives as a burst...
+        for i in range(0, len(records), TOKEN_REFRESH_BATCH):
+            uow = self.bot.database.unit_of_work()
+            try:
+                await asyncio.gather(*(refresh(record) for record in records[i : i + TOKEN_REFRESH_BATCH]))
+            finally:
+                # Each batch is saved before the next starts, even if it fails part way, as the old refresh tokens
+                # are no longer valid. The updates are grouped into one executemany, and revoked links one delete...
+                for user_id, tokens in refreshed:
+                    self.update_contributor_access_tokens(tokens, user_id, uow=uow)
+
+                if revoked:
+                    self.bot.database.delete_collective_links(ids=revoked, uow=uow)
+
+                await uow.commit()
+
+                saved += len(refreshed)
+                pruned += len(revoked)
+                refreshed.clear()
+                revoked.clear()
+
+        _log.info(
+            'Refreshed %s of %s expiring Open Collective access tokens in %.2fs (%s revoked, %s failed)',
+            saved,
+            len(records),
+            time.perf_counter() - start,
+            pruned,
+            failed,
+        )
+
+    async def sync_contributor(
+        self, record: OpenCollectiveSyncRecord, contributor: OpenCollectiveContributor, *, uow: UnitOfWork
+    ) -> SyncOutcome:
         metadata = contributor.to_metadata()
-        url = f'https://discord.com/api/v10/users/@me/applications/{config["OPENCOLLECTIVE"]["discord_client_id"]}/role-connection'
         payload = {
             'platform_name': 'Open Collective',
             'platform_username': contributor.name,
             'metadata': metadata,
         }
 
-        async with self.bot.session.put(url, json=payload, headers={'Authorization': f'Bearer {access_token}'}) as resp:
+        # Nothing to push if Discord already has exactly this role connection
+        digest = role_connection_hash(payload)
+        if digest == record['metadata_hash']:
+            return 'skipped'
+
+        now = datetime.datetime.utcnow()
+        access_token = record['access_token']
+        # Normally refreshed ahead of time by refresh_expiring_tokens, this covers tokens that expired while offline
+        if now > record['expires_at']:
+            try:
+                tokens = await self.refresh_access_token(record)
+            except TokenRevoked:
+                async with self.bot.database.unit_of_work() as revoked:
+                    self.delete_contributor_link(record['id'], uow=revoked)
+                return 'revoked'
+            except Exception as e:
+                # Unknown error, just skip for now.
+                await self.log_error('Unknown error while refreshing access token', error=e, record=repr(record))
+                return 'failed'
+            else:
+                access_token = tokens['access_token']
+                # Saved straight away, as Discord stopped accepting the old refresh token when it issued this one...
+                async with self.bot.database.unit_of_work() as saved:
+                    self.update_contributor_access_tokens(tokens, record['id'], uow=saved)
+
+        url = f'https://discord.com/api/v10/users/@me/applications/{config["OPENCOLLECTIVE"]["discord_client_id"]}/role-connection'
+
+        # The role connection is rate limited per user token...
+        headers = {'Authorization': f'Bearer {access_token}'}
+        route = f'role-connection:{record["id"]}'
+
+        async with self.bot.web.request('discord', 'PUT', url, json=payload, headers=headers, limiter=self.limiter, route=route) as resp:
             if resp.status != 200:
                 await self.log_error(
                     f'Failed to update contributor metadata to Discord: {resp.status}',
                     record=repr(record),
                     metadata=repr(metadata),
                 )
-                return
+                return 'failed'
+
+        self.bot.database.update_collective_metadata_hash(id=record['id'], metadata_hash=digest, uow=uow)
+        return 'synced'
 
     @tasks.loop(hours=12)
     async def update_contributor_metadata(self) -> None:
-        contributors = await self.load_collective_data()
+        await self.sync_contributors()
+
+    async def sync_contributors(self, *, backfill: bool = False) -> collections.Counter[SyncOutcome]:
+        """Sync the contributors from every transaction since the checkpoint, or from the full history on a backfill."""
+        async with self._sync_lock:
+            return await self._sync_contributors(backfill=backfill)
+
+    async def _sync_contributors(self, *, backfill: bool) -> collections.Counter[SyncOutcome]:
+        outcomes: collections.Counter[SyncOutcome] = collections.Counter()
+
+        if backfill:
+            since = None
+        else:
+            checkpoint = await self.bot.database.fetch_collective_checkpoint(slug=COLLECTIVE_SLUG)
+            since = checkpoint['last_created_at'] if checkpoint else discord.utils.utcnow() - INITIAL_LOOKBACK
+
+        contributors, latest = await self.load_collective_data(since)
 
         # Don't do anything if there isn't any new data
         if len(contributors) == 0:
-            _log.info('No contributions found to sync')
-            return
+            _log.info('No contributions found to sync since %s', since)
+            return outcomes
 
-        credentials_query = "SELECT * FROM open_collective_sync WHERE account_id = ANY($1::text[])"
-        records: list[OpenCollectiveSyncRecord] = await self.bot.database.pool.fetch(credentials_query, list(contributors.keys()))
-        for record in records:
+        workers = config['OPENCOLLECTIVE'].get('workers', SYNC_WORKERS)
+        semaphore = asyncio.Semaphore(workers)
+
+        failed_at: list[datetime.datetime] = []
+
+        async def sync(record: OpenCollectiveSyncRecord) -> None:
             contributor = contributors[record['account_id']]
-            await self.sync_contributor(record, contributor)
 
-        _log.info('Finished syncing %s Open Collective contributors', len(records))
+            async with semaphore:
+                try:
+                    outcome = await self.sync_contributor(record, contributor, uow=uow)
+                except Exception as e:
+                    outcome = 'failed'
+                    await self.log_error('Unknown error while syncing contributor', error=e, record=repr(record))
+
+            outcomes[outcome] += 1
+            if outcome == 'failed':
+                failed_at.append(contributor.last_donation)
+
+        # Metadata hashes are written in one transaction at the end of the run, even if it fails part way.
+        # Losing them only costs a repeated push next run; token refreshes are saved as soon as they happen...
+        start = time.perf_counter()
+        uow = self.bot.database.unit_of_work()
+        try:
+            records = [record async for record in self.bot.database.iter_collective_sync(list(contributors.keys()))]
+            await asyncio.gather(*(sync(record) for record in records))
+
+            if latest is not None:
+                self.bot.database.set_collective_checkpoint(
+                    slug=COLLECTIVE_SLUG, created_at=self.next_checkpoint(latest, failed_at), uow=uow
+                )
+        finally:
+            await uow.commit()
+
+        _log.info(
+            'Finished syncing %s of %s Open Collective contributors in %.2fs with %s workers '
+            '(%s unchanged and skipped, %s revoked, %s failed)',
+            outcomes['synced'],
+            sum(outcomes.values()),
+            time.perf_counter() - start,
+            workers,
+            outcomes['skipped'],
+            outcomes['revoked'],
+            outcomes['failed'],
+        )
+        return outcomes
+
+    def next_checkpoint(self, latest: datetime.datetime, failed_at: list[datetime.datetime]) -> datetime.datetime:
+        """Where the next run should start: just before the oldest recent failure, so it is loaded again, or `latest`.
+
+        Failures older than FAILED_RETRY_WINDOW are given up on, so one contributor failing on every run can't keep
+        the checkpoint from moving.
+        """
+        cutoff = discord.utils.utcnow() - FAILED_RETRY_WINDOW
+        retrying = [created_at for created_at in failed_at if created_at > cutoff]
+
+        if len(retrying) < len(failed_at):
+            _log.warning(
+                'Giving up on %s failed contributors whose transactions predate %s', len(failed_at) - len(retrying), cutoff
+            )
+
+        if not retrying:
+            return latest
+
+        # Transactions at or before the checkpoint are skipped, so it stops a moment before the failed one
+        return min(retrying) - datetime.timedelta(microseconds=1)
+
+    async def sync_account(self, account_slug: str) -> collections.Counter[SyncOutcome]:
+        """Sync every Discord user linked to a single Open Collective account, leaving the checkpoint alone."""
+        outcomes: collections.Counter[SyncOutcome] = collections.Counter()
+
+        contributor = await self.load_contributor(account_slug)
+        if contributor is None:
+            return outcomes
+
+        async with self._sync_lock:
+            uow = self.bot.database.unit_of_work()
+            try:
+                async for record in self.bot.database.iter_collective_sync([contributor.id]):
+                    outcomes[await self.sync_contributor(record, contributor, uow=uow)] += 1
+            finally:
+                await uow.commit()
+
+        _log.info('Synced Open Collective account %s from a webhook: %s', account_slug, dict(outcomes))
+        return outcomes
+
+    @commands.command(name='ocbackfill')
+    @commands.is_owner()
+    async def backfill_contributors(self, ctx: commands.Context[core.Bot]) -> None:
+        """Sync every linked contributor from the full Open Collective transaction history."""
+        async with ctx.typing():
+            outcomes = await self.sync_contributors(backfill=True)
+
+        await ctx.send(
+            f'Backfilled Open Collective contributors: {outcomes["synced"]} synced, {outcomes["skipped"]} unchanged, '
+            f'{outcomes["revoked"]} revoked, {outcomes["failed"]} failed'
+        )
 
     async def log_error(self, message: str, *, error: Exception | None = None, **fields: str) -> None:
         e = discord.Embed(title='Open Collective Sync Error', colour=0xDD5F53)
@@ -301,8 +640,89 @@ class OpenCollective(commands.Cog):
             # If anything happened here, just discard is completely.
             pass
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
+    async def start_webhook_server(self) -> None:
+        options = config['OPENCOLLECTIVE']['webhook']
+
+        app = web.Application()
+        app.router.add_post('/opencollective/transactions', self.handle_transaction_webhook)
+        app.router.add_post('/opencollective/credentials', self.handle_credentials_webhook)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        host = options.get('host', WEBHOOK_HOST)
+        port = options.get('port', WEBHOOK_PORT)
+        await web.TCPSite(self._runner, host, port).start()
+
+        _log.info('Listening for Open Collective webhooks on %s:%s', host, port)
+
+    def verify_signature(self, body: bytes, signature: str | None) -> bool:
+        if not signature or not signature.startswith('sha256='):
+            return False
+
+        secret = config['OPENCOLLECTIVE']['webhook']['secret'].encode()
+        expected = hmac.new(secret, body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature.removeprefix('sha256='))
+
+    async def read_webhook(self, request: web.Request) -> Any:
+        body = await request.read()
+        if not self.verify_signature(body, request.headers.get(WEBHOOK_SIGNATURE_HEADER)):
+            raise web.HTTPUnauthorized
+
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise web.HTTPBadRequest from None
+
+    def spawn_sync(self, account_slug: str) -> None:
+        async def run() -> None:
+            try:
+                await self.sync_account(account_slug)
+            except Exception as e:
+                await self.log_error('Unknown error while syncing from a webhook', error=e, slug=account_slug)
+
+        # Answered straight away, so the sender's delivery never waits on Discord...
+        task = asyncio.create_task(run())
+        self._webhook_tasks.add(task)
+        task.add_done_callback(self._webhook_tasks.discard)
+
+    async def handle_transaction_webhook(self, request: web.Request) -> web.Response:
+        payload = await self.read_webhook(request)
+        if not isinstance(payload, dict) or payload.get('type') != 'collective.transaction.created':
+            return web.Response(status=204)
+
+        data = payload.get('data') or {}
+        account = data.get('fromCollective') or data.get('fromAccount') or {}
+        if not isinstance(account, dict) or not account.get('slug'):
+            raise web.HTTPBadRequest
+
+        self.spawn_sync(account['slug'])
+        return web.Response(status=202)
+
+    async def handle_credentials_webhook(self, request: web.Request) -> web.Response:
+        credentials = Credentials.from_payload(await self.read_webhook(request))
+        if credentials is None:
+            raise web.HTTPBadRequest
+
+        # Written now rather than deferred, as the sync below reads it back straight away
+        await self.link_contributor(credentials, defer=False)
+        self.spawn_sync(credentials.slug)
+        return web.Response(status=202)
+
+    async def link_contributor(self, credentials: Credentials, *, defer: bool) -> None:
+        expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=credentials.expires_in)
+        await self.bot.database.upsert_collective_sync(
+            id=credentials.user_id,
+            name=credentials.name,
+            slug=credentials.slug,
+            account_id=credentials.id,
+            access_token=credentials.access_token,
+            refresh_token=credentials.refresh_token,
+            expires_at=expires_at,
+            defer=defer,
+        )
+
+    async def on_credentials_message(self, message: discord.Message):
         if message.channel.id != WEBHOOK_CHANNEL_ID:
             return
 
@@ -317,29 +737,10 @@ class OpenCollective(commands.Cog):
         if credentials is None:
             return
 
-        query = """
-            INSERT INTO open_collective_sync (id, name, slug, account_id, access_token, refresh_token, expires_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            ON CONFLICT (id) DO UPDATE
-            SET
-                name = EXCLUDED.name,
-                slug = EXCLUDED.slug,
-                account_id = EXCLUDED.account_id,
-                access_token = EXCLUDED.access_token,
-                refresh_token = EXCLUDED.refresh_token,
-                expires_at = EXCLUDED.expires_at
-        """
-        expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=credentials.expires_in)
-        await self.bot.database.pool.execute(
-            query,
-            credentials.user_id,
-            credentials.name,
-            credentials.slug,
-            credentials.id,
-            credentials.access_token,
-            credentials.refresh_token,
-            expires_at,
-        )
+        # Donations made before linking are behind the checkpoint, so the account is synced now rather than waiting
+        # for a new donation. Written now rather than deferred, as the sync reads it back straight away...
+        await self.link_contributor(credentials, defer=False)
+        self.spawn_sync(credentials.slug)
 
 
 async def setup(bot: core.Bot) -> None:
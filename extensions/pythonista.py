@@ -16,11 +16,9 @@ limitations under the License.
 from __future__ import annotations
 
 import asyncio
-import datetime
 import logging
-import re
-from collections import defaultdict
-from typing import cast
+import time
+from typing import TYPE_CHECKING, cast
 
 import discord
 from discord import app_commands
@@ -29,6 +27,12 @@ from discord.ext import commands
 import core
 
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from types_.config import AutoModRaid, AutoModRule
+
+
 logger: logging.Logger = logging.getLogger(__name__)
 
 
@@ -36,177 +40,330 @@ PYTHONISTA: int = 490948346773635102
 TIME: int = 859565527343955998
 BUNNIE: int = 719993112596054028
 
-BYPASS_ROLES: tuple[int, ...] = (
-    570452583932493825,
-    1064477988013477939,
-    986107886470049892,
-    1099565946403836015,
-    1160372911853555814,
-    873944105598738462,
-    862802293891530812,
+BYPASS_ROLES: frozenset[int] = frozenset(
+    {
+        570452583932493825,
+        1064477988013477939,
+        986107886470049892,
+        1099565946403836015,
+        1160372911853555814,
+        873944105598738462,
+        862802293891530812,
+    }
 )
 
-GENERAL_CHANNELS: tuple[int, ...] = (490950520412831746, 1292898281931935938, 916551676448636969)
+GENERAL_CHANNELS: frozenset[int] = frozenset({490950520412831746, 1292898281931935938, 916551676448636969})
 TIO_TESTER: int = 1286823927540219916
 HONEY_ROLE: int = 1292886539877093549
-BEE_CHANNELS: tuple[int, ...] = (1292898281931935938, 490950520412831746, 1006716547223519293, 490951172673372195)
+BEE_CHANNELS: frozenset[int] = frozenset({1292898281931935938, 490950520412831746, 1006716547223519293, 490951172673372195})
 
 CHANNEL_SPREAD: int = 3
 CHANNEL_SPREAD_RATE: float = 5
+CHANNEL_SPREAD_RATE_NEW: float = 15.5
 
-URL_REGEX: re.Pattern[str] = re.compile(
-    r"((http|https)\:\/\/)?[a-zA-Z0-9\.\/\?\:@\-_=#]+\.([a-zA-Z]){2,6}([a-zA-Z0-9\.\&\/\?\:@\-_=#])*", re.IGNORECASE
-)
-AI_REGEX: re.Pattern[str] = re.compile(r"\S+\.ai")
+RAID_JOINS: int = 10
+RAID_WINDOW: float = 30
+RAID_YOUNG_JOINS: int = 5
+RAID_YOUNG_WINDOW: float = 60
+RAID_YOUNG_AGE: float = 60 * 60 * 24 * 7
+RAID_COOLDOWN: float = 60 * 15
+
+DUPLICATES: int = 4
+DUPLICATES_WINDOW: float = 60
+DUPLICATES_SIMILARITY: float = 0.7
+
+# Matched case insensitively. The lookbehind only lets a match start where a run of URL characters starts; a match
+# failing there fails at every later position in the run, so results are unchanged and the backtracking is avoided...
+URL_PATTERN: str = r"(?<![a-zA-Z0-9\.\/\?\:@\-_=#])((http|https)\:\/\/)?[a-zA-Z0-9\.\/\?\:@\-_=#]+\.([a-zA-Z]){2,6}([a-zA-Z0-9\.\&\/\?\:@\-_=#])*"
+# Found wherever "\S+\.ai" would be, without first consuming the whole word...
+AI_PATTERN: str = r"(?<=\S)\.ai"
 
 URL_MAX: int = 3
 
+# Rules run in this order, and the first rule to return a reason stops the rest...
+# Every option can be overridden per rule in the AUTOMOD config table...
+# The "strict" options replace the others while a guild is in strict mode after a raid...
+DEFAULT_RULES: dict[str, AutoModRule] = {
+    "spread": {
+        "guilds": [PYTHONISTA, TIME, BUNNIE],
+        "threshold": CHANNEL_SPREAD,
+        "window": CHANNEL_SPREAD_RATE,
+        "new_window": CHANNEL_SPREAD_RATE_NEW,
+        "reason": "Spamming across channels",
+    },
+    "slurs": {
+        "guilds": [BUNNIE],
+        "bypass": False,
+        "terms": ["nigger", "nigga"],
+        "reason": "Racist Slurs",
+    },
+    "honeypot": {
+        "channels": sorted(GENERAL_CHANNELS & BEE_CHANNELS),
+        "joined_within": 24,
+        "role": HONEY_ROLE,
+        "reason": "Honeypot",
+        "strict": {"joined_within": 168},
+    },
+    "advertising": {
+        "channels": sorted(GENERAL_CHANNELS),
+        "joined_within": 24,
+        "pattern": AI_PATTERN,
+        "reason": "Suspected Advertising/Spam (New Member)",
+        "strict": {"joined_within": 168},
+    },
+    "url_spam": {
+        "channels": sorted(GENERAL_CHANNELS),
+        "joined_within": 1,
+        "threshold": URL_MAX,
+        "pattern": URL_PATTERN,
+        "reason": "URL Spam (New Member)",
+        "strict": {"joined_within": 24},
+    },
+    "duplicates": {
+        "guilds": [PYTHONISTA, TIME, BUNNIE],
+        "joined_within": 24,
+        "threshold": DUPLICATES,
+        "window": DUPLICATES_WINDOW,
+        "similarity": DUPLICATES_SIMILARITY,
+        "reason": "Copy-paste spam across accounts (New Member)",
+        "strict": {"joined_within": 168, "threshold": 3},
+    },
+}
+
+
+def _honeypot(options: AutoModRule) -> core.automod.RuleCheck:
+    role: int = options.get("role", HONEY_ROLE)
+    reason: str = options.get("reason", "Honeypot")
+
+    def check(facts: core.Facts) -> str | None:
+        return reason if role in facts.role_ids else None
+
+    return check
+
 
 class Pythonista(commands.Cog):
-    def __init__(self, bot: core.Bot) -> None:
+    def __init__(self, bot: core.Bot, *, clock: Callable[[], float] = time.monotonic) -> None:
         self.bot: core.Bot = bot
-
-        self._channel_spread: dict[int, set[int]] = defaultdict(set)
-        self._tasks: set[asyncio.Task[None]] = set()
+        # Every automod window is measured with this clock; the replay benchmark drives it from recorded events...
+        self.clock: Callable[[], float] = clock
+
+        self.spread: core.ChannelSpread | None = None
+        self.duplicates: core.NearDuplicates | None = None
+        self.bans: core.BanDispatcher = core.BanDispatcher()
+
+        # Filled in by the content rules as they're created...
+        self._terms: list[str] = []
+        self._flags: dict[str, str] = {}
+        self._url: str | None = None
+        self._url_limit: int = 0
+
+        self.automod: core.RuleEngine = core.RuleEngine.from_config(
+            {
+                "spread": self._spread,
+                "slurs": self._slurs,
+                "honeypot": _honeypot,
+                "advertising": self._advertising,
+                "url_spam": self._url_spam,
+                "duplicates": self._duplicates,
+            },
+            defaults=DEFAULT_RULES,
+            bypass_roles=BYPASS_ROLES,
+            clock=clock,
+        )
+
+        raid: AutoModRaid = core.config.get("AUTOMOD", {}).get("raid", {})
+        self.raid_cooldown: float = raid.get("cooldown", RAID_COOLDOWN)
+        self.raids: core.RaidDetector = core.RaidDetector(
+            joins=raid.get("joins", RAID_JOINS),
+            window=raid.get("window", RAID_WINDOW),
+            young_joins=raid.get("young_joins", RAID_YOUNG_JOINS),
+            young_window=raid.get("young_window", RAID_YOUNG_WINDOW),
+            young_age=raid.get("young_age", RAID_YOUNG_AGE),
+            clock=clock,
+        )
+
+        # Every content rule shares one scanner, so each check runs at most once per message...
+        self.scanner: core.Scanner = core.Scanner(
+            terms=self._terms,
+            flags=self._flags,
+            url=self._url,
+            url_limit=self._url_limit,
+        )
 
     def _check_current_member(self, member: discord.Member) -> bool:
         guild: discord.Guild | None = self.bot.get_guild(PYTHONISTA)
         if not guild:
             return False
 
-        return member in guild.members
+        return guild.get_member(member.id) is not None
+
+    async def _log(self, content: str) -> None:
+        webhook: discord.Webhook = discord.Webhook.from_url(core.config["PYTHONISTA"]["logs"], client=self.bot)
+        await webhook.send(content, username="RMysty AutoMod")
 
     async def _do_ban(self, member: discord.Member, *, reason: str = "No reason given...") -> None:
-        try:
-            await member.ban(delete_message_days=1, reason=f"AutoBan: {reason}")
-            if member.guild.id == BUNNIE:
-                channel: discord.TextChannel = member.guild.get_channel(725130035069059198)  # type: ignore
-                if not channel:
-                    return
-
-                await channel.send(f"{member.mention}`(ID: {member.id})[{member.name}]` was banned for: `{reason}`.")
-        except discord.HTTPException as e:
+        # Every message in a raid can trigger the same ban; the dispatcher only sends the first of them...
+        result: core.BanResult = await self.bans.ban(member.guild, member, reason=f"AutoBan: {reason}")
+
+        if result.error:
             if not self._check_current_member(member):
                 return
 
-            webhook: discord.Webhook = discord.Webhook.from_url(core.config["PYTHONISTA"]["logs"], client=self.bot)
-            await webhook.send(
-                f"Unable to ban user for `{reason}`: `{member} (ID: {member.id})` > `{e}`",
-                username="RMysty AutoMod",
-            )
+            await self._log(f"Unable to ban user for `{reason}`: `{member} (ID: {member.id})` > `{result.error}`")
+            return
 
-    async def _spread_waiter(self, member: discord.Member, *, rate: float = CHANNEL_SPREAD_RATE) -> None:
-        await asyncio.sleep(rate)
+        if member.guild.id == BUNNIE:
+            channel: discord.TextChannel = member.guild.get_channel(725130035069059198)  # type: ignore
+            if not channel:
+                return
 
-        spread = self._channel_spread[member.id]
-        if len(spread) >= CHANNEL_SPREAD:
-            await self._do_ban(member, reason="Spamming across channels")
+            await channel.send(f"{member.mention}`(ID: {member.id})[{member.name}]` was banned for: `{reason}`.")
 
-        spread.clear()
+    def _scan(self, facts: core.Facts) -> core.Scan:
+        return facts.lazy("scan", lambda f: self.scanner.scan(f.content))
 
-    async def cog_unload(self) -> None:
-        for task in self._tasks:
-            try:
-                task.cancel()
-            except Exception as e:
-                logger.debug("Failed to cancel running spread task: %s", e)
+    def _slurs(self, options: AutoModRule) -> core.automod.RuleCheck:
+        reason: str = options.get("reason", "Racist Slurs")
+        self._terms.extend(options.get("terms", ()))
 
-    def is_new(self, member: discord.Member, hours: int = 24) -> bool:
-        joined: datetime.datetime | None = member.joined_at
-        if not joined:
-            return False
+        def check(facts: core.Facts) -> str | None:
+            return reason if self._scan(facts).term() else None
 
-        now: datetime.datetime = datetime.datetime.now(tz=datetime.UTC)
-        delta: datetime.timedelta = datetime.timedelta(hours=hours)
+        return check
 
-        return joined + delta >= now
+    def _advertising(self, options: AutoModRule) -> core.automod.RuleCheck:
+        reason: str = options.get("reason", "Suspected Advertising/Spam (New Member)")
+        self._flags["ai"] = options.get("pattern", AI_PATTERN)
 
-    def url_count(self, content: str) -> int:
-        matches = URL_REGEX.findall(content)
-        return len(matches)
+        def check(facts: core.Facts) -> str | None:
+            return reason if self._scan(facts).flag("ai") else None
 
-    @commands.Cog.listener("on_message")
-    async def on_message_bunnie(self, message: discord.Message) -> None:
-        if message.author.bot:
-            return
+        return check
 
-        if not message.guild or message.guild.id != BUNNIE:
-            return
+    def _url_spam(self, options: AutoModRule) -> core.automod.RuleCheck:
+        threshold: int = options.get("threshold", URL_MAX)
+        strict: int = options.get("strict", {}).get("threshold", threshold)
+        reason: str = options.get("reason", "URL Spam (New Member)")
 
-        author: discord.Member = cast(discord.Member, message.author)
-        if author.guild_permissions.kick_members:
-            return
+        self._url = options.get("pattern", URL_PATTERN)
+        self._url_limit = max(threshold, strict)
 
-        if "nigger" in message.content or "nigga" in message.content:
-            await self._do_ban(author, reason="Racist Slurs")
+        def check(facts: core.Facts) -> str | None:
+            return reason if self._scan(facts).urls() > (strict if facts.strict else threshold) else None
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        if message.author.bot:
-            return
+        return check
 
-        if not message.guild or message.guild.id not in (PYTHONISTA, TIME, BUNNIE):
-            return
+    def _spread(self, options: AutoModRule) -> core.automod.RuleCheck:
+        window: float = options.get("window", CHANNEL_SPREAD_RATE)
+        new_window: float = options.get("new_window", CHANNEL_SPREAD_RATE_NEW)
+        reason: str = options.get("reason", "Spamming across channels")
 
-        author: discord.Member = cast(discord.Member, message.author)
-        if any(r.id in BYPASS_ROLES for r in author.roles):
-            return
+        spread: core.ChannelSpread = core.ChannelSpread(threshold=options.get("threshold", CHANNEL_SPREAD), clock=self.clock)
+        self.spread = spread
 
-        if author.guild_permissions.kick_members:
-            return
+        def check(facts: core.Facts) -> str | None:
+            # Increase the window we look at for spread on new joins...
+            rate: float = new_window if facts.joined_within(24) else window
+            return reason if spread.observe(facts.member.id, facts.channel_id, window=rate) else None
 
-        # Increase the time we wait for spread on new joins...
-        rate: float = 15.5 if self.is_new(author) else CHANNEL_SPREAD_RATE
+        return check
 
-        spread = self._channel_spread[author.id]
-        if not spread:
-            task: asyncio.Task[None] = asyncio.create_task(self._spread_waiter(author, rate=rate))
-            task.add_done_callback(lambda t: self._tasks.remove(t))
-            self._tasks.add(task)
+    def _duplicates(self, options: AutoModRule) -> core.automod.RuleCheck:
+        reason: str = options.get("reason", "Copy-paste spam across accounts (New Member)")
+        threshold: int = options.get("threshold", DUPLICATES)
+        strict: int = options.get("strict", {}).get("threshold", threshold)
 
-        spread.add(message.channel.id)
+        duplicates: core.NearDuplicates = core.NearDuplicates(
+            threshold=threshold,
+            window=options.get("window", DUPLICATES_WINDOW),
+            similarity=options.get("similarity", DUPLICATES_SIMILARITY),
+            clock=self.clock,
+        )
+        self.duplicates = duplicates
 
-    @commands.Cog.listener("on_message")
-    async def on_message_ot(self, message: discord.Message) -> None:
-        if message.author.bot:
-            return
+        def check(facts: core.Facts) -> str | None:
+            members: frozenset[int] = duplicates.observe(
+                facts.guild_id,
+                facts.member.id,
+                facts.content,
+                threshold=strict if facts.strict else threshold,
+            )
+            if not members:
+                return None
+
+            # The members who posted before the threshold was reached are banned along with this one...
+            facts.related.update(members - {facts.member.id})
+            return reason
+
+        return check
+
+    async def cog_load(self) -> None:
+        if self.spread:
+            self.spread.start()
+
+    async def cog_unload(self) -> None:
+        if self.spread:
+            await self.spread.close()
 
-        if message.channel.id not in GENERAL_CHANNELS:
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        if message.author.bot or not message.guild:
             return
 
-        assert isinstance(message.author, discord.Member)
-        member: discord.Member = message.author
+        # Most guilds have no rules at all; nothing about the message is computed for them...
+        if not self.automod.rules_for(message.guild.id):
+            return
 
-        if any(r.id in BYPASS_ROLES for r in member.roles):
+        if not isinstance(message.author, discord.Member):
             return
 
-        if member.guild_permissions.kick_members:
+        facts: core.Facts = self.automod.facts(message, message.author)
+        verdict: core.Verdict | None = self.automod.evaluate(facts)
+
+        if not verdict:
             return
 
-        if not self.is_new(member):
+        related: list[discord.Member] = [m for i in verdict.related if (m := message.guild.get_member(i))]
+        await asyncio.gather(
+            self._do_ban(message.author, reason=verdict.reason),
+            *(self._do_ban(m, reason=verdict.reason) for m in related),
+        )
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        # Raids are only tracked, and strict mode only entered, where automod is explicitly configured...
+        if member.bot or member.guild.id not in self.automod.guilds:
             return
 
-        if member.get_role(HONEY_ROLE) and message.channel.id in BEE_CHANNELS:
-            return await self._do_ban(member, reason="Honeypot")
+        age: float = (discord.utils.utcnow() - member.created_at).total_seconds()
+        reason: str | None = self.raids.observe(member.guild.id, age)
 
-        content: str = message.content
+        # Joins during a raid keep extending strict mode, but only the start of it is reported...
+        if not reason or not self.automod.escalate(member.guild.id, self.raid_cooldown):
+            return
+
+        logger.warning("Raid detected in %s(%d): %s", str(member.guild), member.guild.id, reason)
 
-        if AI_REGEX.findall(content):
-            return await self._do_ban(member, reason="Suspected Advertising/Spam (New Member)")
+        await self._log(
+            f"Raid detected in `{member.guild} (ID: {member.guild.id})`: {reason}. "
+            f"AutoMod is strict for the next {self.raid_cooldown / 60:g} minutes."
+        )
 
-        urls: int = self.url_count(content)
-        if urls > URL_MAX and self.is_new(member, hours=1):
-            return await self._do_ban(member, reason="URL Spam (New Member)")
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        self.automod.members.invalidate(member.guild.id, member.id)
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        self.automod.members.invalidate(after.guild.id, after.id)
+
         if after.bot:
             return
 
         if after.guild.id != PYTHONISTA:
             return
 
-        if any(r.id in BYPASS_ROLES for r in after.roles):
+        if self.automod.members.get(after).bypass_role:
             return
 
         if after.guild_permissions.kick_members:
@@ -256,13 +413,23 @@ class Pythonista(commands.Cog):
         else:
             await interaction.response.send_message("Successfully added to `Twitchio Tester`", ephemeral=True)
 
+    @commands.command(name="automod")
+    @commands.is_owner()
+    async def automod_stats(self, ctx: commands.Context[core.Bot]) -> None:
+        """Show how often each automod rule has acted and how long it takes to run, in milliseconds."""
+        lines: list[str] = [
+            f"{rule.name:<12} hits {rule.hits:>5} | runs {rule.stats.requests:>7} | errors {rule.stats.errors:>3} | "
+            f"mean {rule.stats.mean:.3f} | p95 {rule.stats.percentile(95):.3f} | max {rule.stats.max:.3f}"
+            for rule in self.automod.rules
+        ]
+
+        await ctx.send("```\n" + ("\n".join(lines) or "No automod rules are enabled.") + "\n```")
+
     @commands.command(aliases=["nban"])
     @commands.has_permissions(ban_members=True)
     async def netban(self, ctx: commands.Context[core.Bot], user: discord.User | int, *, reason: str | None = None) -> None:
         to_ban: discord.User | discord.Object = user if isinstance(user, discord.User) else discord.Object(id=user)
         guilds: list[discord.Guild] = []
-        errors: list[discord.Guild] = []
-        success: list[discord.Guild] = []
 
         for guild in ctx.author.mutual_guilds:
             mod = guild.get_member(ctx.author.id)
@@ -280,28 +447,39 @@ class Pythonista(commands.Cog):
 
             guilds.append(guild)
 
-        message = f"NetBan Mod({ctx.author}): {reason or 'No reason provided.'}"
+        if not guilds:
+            await ctx.send("Unsuccessful Ban: There are no mutual guilds where we can both ban members.")
+            return
 
-        for guild in guilds:
-            try:
-                await guild.ban(to_ban, reason=message, delete_message_days=7)
-            except discord.NotFound:
-                await ctx.send(f"Unsuccessful Ban: The user provided `{to_ban}` could not be found.")
-                return
-            except discord.HTTPException as e:
-                logger.warning("Unable to NetBan %s from %s(%d): %s", str(to_ban), str(guild), guild.id, e)
-                errors.append(guild)
-            else:
-                success.append(guild)
+        message = f"NetBan Mod({ctx.author}): {reason or 'No reason provided.'}"
+        status: discord.Message = await ctx.send(f"NetBanning `{to_ban}` from {len(guilds)} guilds...")
+
+        async def progress(results: Sequence[core.BanResult]) -> None:
+            failed: int = sum(not r.ok for r in results)
+            await status.edit(content=f"NetBanning `{to_ban}`: {len(results)}/{len(guilds)} guilds done, {failed} failed...")
+
+        results: list[core.BanResult] = await self.bans.ban_many(
+            guilds,
+            to_ban,
+            reason=message,
+            delete_message_seconds=604800,
+            progress=progress,
+        )
+
+        if all(isinstance(r.error, discord.NotFound) for r in results):
+            await status.edit(content=f"Unsuccessful Ban: The user provided `{to_ban}` could not be found.")
+            return
 
-            await asyncio.sleep(1)
+        errors: list[core.BanResult] = [r for r in results if r.error]
+        for r in errors:
+            logger.warning("Unable to NetBan %s from %s(%d): %s", str(to_ban), str(r.guild), r.guild.id, r.error)
 
-        error = f"\n\nUnable to ban from the following guilds: `{', '.join(g.name for g in errors)}`" if errors else ""
+        error = f"\n\nUnable to ban from the following guilds: `{', '.join(r.guild.name for r in errors)}`" if errors else ""
 
-        guild_msg = ", ".join(f"`{g.name}({g.id})`" for g in success)
+        guild_msg = ", ".join(f"`{r.guild.name}({r.guild.id})`" for r in results if r.ok)
         user_msg = f"`@{to_ban} ({to_ban.id})`"
 
-        await ctx.send(f"Banned {user_msg} from {guild_msg}.{error}")
+        await status.edit(content=f"Banned {user_msg} from {guild_msg}.{error}")
 
 
 async def setup(bot: core.Bot) -> None:
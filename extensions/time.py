@@ -17,7 +17,6 @@ import datetime
 from typing import TYPE_CHECKING, cast
 
 import discord
-import pytz
 from discord import app_commands
 from discord.ext import commands
 
@@ -45,6 +44,7 @@ class Time(commands.Cog):
 
     def __init__(self, bot: core.Bot) -> None:
         self.bot = bot
+        self.timezones: core.Timezones = core.Timezones(backend=core.config["OPTIONS"].get("timezones", "pytz"))
 
     def build_embed(self, user: discord.User, dt: datetime.datetime) -> discord.Embed:
         colour = 1513835 if dt.hour <= 6 or dt.hour >= 18 else 15460239
@@ -103,16 +103,17 @@ class Time(commands.Cog):
         Parameters
         ----------
         timezone: str
-            Your current timezone. E.g. "US/Eastern" or "Europe/London".
+            Your current timezone. E.g. "Europe/London", "US/Eastern", "PST" or "Tokyo".
         """
         await interaction.response.defer(ephemeral=True)
 
-        if timezone not in pytz.all_timezones:
+        resolved = self.timezones.resolve(timezone)
+        if resolved is None:
             await interaction.followup.send(f"`{timezone}` is not a valid timezone.")
             return
 
-        await self.bot.database.set_user_timezone(uid=interaction.user.id, timezone=timezone)
-        await interaction.followup.send(f"Set your current timezone to `{timezone}` successfully.")
+        await self.bot.database.set_user_timezone(uid=interaction.user.id, timezone=resolved)
+        await interaction.followup.send(f"Set your current timezone to `{resolved}` successfully.")
 
     @time_group.command(name="fetch")
     async def time_get(self, interaction: discord.Interaction, *, user: discord.User | None = None) -> None:
@@ -154,13 +155,12 @@ class Time(commands.Cog):
             resultt = await self.bot.database.fetch_user_timezone(uid=interaction.user.id)
 
             if resultt:
-                tz = pytz.timezone(resultt.timezone)
-                utc = datetime.datetime.now(tz=datetime.UTC)
-                secondt = utc.astimezone(tz=tz)
+                secondt = self.timezones.now(resultt.timezone)
 
-        tz = pytz.timezone(result.timezone)
-        utc = datetime.datetime.now(tz=datetime.UTC)
-        local_ = utc.astimezone(tz=tz)
+        local_ = self.timezones.now(result.timezone)
+        if local_ is None:
+            await interaction.followup.send(f"{resolved.mention} has an unknown timezone set: `{result.timezone}`.")
+            return
 
         if second and secondt:
             embed = self.build_dual_embed(one=resolved, two=second, dtone=local_, dttwo=secondt)
@@ -171,8 +171,15 @@ class Time(commands.Cog):
 
     @time_set.autocomplete(name="timezone")
     async def time_set_autocomplete(self, interation: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
-        matches = core.extract_or_exact(current, pytz.all_timezones, limit=20, score_cutoff=50)
-        results = [app_commands.Choice(name=m[0], value=m[0]) for m in matches]
+        matches = core.extract_or_exact(current, self.timezones.choices, limit=20, score_cutoff=50)
+        names = [m[0] for m in matches]
+
+        # Links, abbreviations and cities rarely fuzzy match the zone they resolve to...
+        resolved = self.timezones.resolve(current) if current else None
+        if resolved and resolved not in names:
+            names = [resolved, *names]
+
+        results = [app_commands.Choice(name=n, value=n) for n in names]
 
         return results
 
@@ -29,7 +29,11 @@ DEBUG = False
 
 def main() -> None:
     async def runner() -> None:
-        async with database.Database() as db, core.Bot(database=db, debug=DEBUG) as bot:
+        async with (
+            core.WebClient() as web,
+            database.from_config(web=web) as db,
+            core.Bot(database=db, web=web, debug=DEBUG) as bot,
+        ):
             await bot.start(core.config["TOKENS"]["discord"])
 
     try:
@@ -13,7 +13,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from typing import TypedDict
+from typing import Literal, NotRequired, TypedDict
 
 
 class Tokens(TypedDict):
@@ -21,12 +21,18 @@ class Tokens(TypedDict):
 
 
 class Database(TypedDict):
+    backend: NotRequired[Literal["postgres", "sqlite"]]
     dsn: str
+    path: NotRequired[str]
+    prefetch: NotRequired[int]
+    write_batch_size: NotRequired[int]
+    write_interval: NotRequired[float]
 
 
 class Options(TypedDict):
     prefixes: str
     logging: int
+    timezones: NotRequired[Literal["zoneinfo", "pytz"]]
 
 
 class Wavelink(TypedDict):
@@ -43,10 +49,67 @@ class Pythonista(TypedDict):
     logs: str
 
 
+class Upstream(TypedDict, total=False):
+    limit: int
+    limit_per_host: int
+    keepalive: float
+    dns_ttl: int
+    timeout: float
+    connect_timeout: float
+    retries: int
+    backoff: float
+    max_retry_after: float
+
+
+class AutoModRule(TypedDict, total=False):
+    enabled: bool
+    guilds: list[int]
+    channels: list[int]
+    bypass: bool
+    joined_within: float
+    reason: str
+    terms: list[str]
+    pattern: str
+    role: int
+    threshold: int
+    window: float
+    new_window: float
+    similarity: float
+    strict: "AutoModRule"
+
+
+class AutoModRaid(TypedDict, total=False):
+    joins: int
+    window: float
+    young_joins: int
+    young_window: float
+    young_age: float
+    cooldown: float
+
+
+class AutoMod(TypedDict, total=False):
+    bypass_roles: list[int]
+    rules: dict[str, AutoModRule]
+    raid: AutoModRaid
+
+
+class MystBin(TypedDict):
+    url: NotRequired[str]
+    stale_after: NotRequired[float]
+
+
+class OpenCollectiveWebhook(TypedDict):
+    secret: str
+    host: NotRequired[str]
+    port: NotRequired[int]
+
+
 class OpenCollective(TypedDict):
     discord_client_id: str
     discord_client_secret: str
     personal_token: str
+    workers: NotRequired[int]
+    webhook: NotRequired[OpenCollectiveWebhook]
 
 
 class Config(TypedDict):
@@ -56,4 +119,7 @@ class Config(TypedDict):
     WAVELINK: Wavelink
     CHII: Chii
     PYTHONISTA: Pythonista
+    MYSTBIN: NotRequired[MystBin]
+    AUTOMOD: NotRequired[AutoMod]
+    HTTP: NotRequired[dict[str, Upstream]]
     OPENCOLLECTIVE: OpenCollective